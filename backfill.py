@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from manager.log_manager import LogManager
+from manager.db_manager import DbManager
+from manager.dart import Dart
+from utils.commons import get_current_time
+from utils.config import DATA_DIR
+
+CHECKPOINT_FILE = DATA_DIR + 'backfill_executive.json'
+
+
+class Backfill:
+    """
+    과거 임원 공시를 하루 단위 shard로 나눠 동시에 적재한다.
+    요청 속도는 HttpManager의 source별 rate limit을 모든 shard가 같이 쓰고,
+    끝난 날짜는 CHECKPOINT_FILE에, 끝난 공시는 dart_receipt에 남아서 중간에 멈춰도 이어서 돌릴 수 있다.
+    """
+    def __init__(self, checkpoint_file=CHECKPOINT_FILE):
+        self.logger = LogManager().logger
+        self.db_manager = DbManager()
+        self.dart = Dart()
+        self.checkpoint_file = checkpoint_file
+        self.lock = threading.Lock()
+        self.done = self.__load_checkpoint()
+
+        self.started = None
+        self.reports = 0
+        self.failed = {}
+
+    def __load_checkpoint(self):
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                return set(json.load(f).get('done', []))
+        except (OSError, ValueError):
+            return set()
+
+    def __save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_file), exist_ok=True)
+        tmp_file = f'{self.checkpoint_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'done': sorted(self.done)}, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def get_shards(self, start_date, end_date):
+        day, end = datetime.strptime(start_date, '%Y%m%d'), datetime.strptime(end_date, '%Y%m%d')
+        shards = []
+        while day <= end:
+            shards.append(day.strftime('%Y%m%d'))
+            day += timedelta(days=1)
+        return [s for s in shards if s not in self.done]
+
+    def __run_shard(self, target_date):
+        result = self.dart.insert_executive(target_date, target_date)
+        if result is None:
+            return target_date, 0, {'list'}
+        return target_date, result[0], result[1]
+
+    def __report(self, target_date, reports, failed, finished, total):
+        with self.lock:
+            self.reports += reports
+            if failed:
+                self.failed[target_date] = sorted(failed)
+            elif target_date < get_current_time('%Y%m%d'):  # 오늘 공시는 더 올라올 수 있으므로 checkpoint에 넣지 않는다
+                self.done.add(target_date)
+                self.__save_checkpoint()
+
+            minutes = (time.monotonic() - self.started) / 60
+            self.logger.info(f"[backfill] {target_date}: {reports} reports, {len(failed)} failed | "
+                             f"shards {finished} / {total}, {self.reports} reports, {self.reports / max(minutes, 1e-6):.1f} reports/min")
+
+    def run(self, start_date, end_date, workers):
+        shards = self.get_shards(start_date, end_date)
+        self.logger.info(f"[backfill] {start_date} ~ {end_date}: {len(shards)} shards left, {workers} workers")
+
+        self.started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.__run_shard, s): s for s in shards}
+            for i, future in enumerate(as_completed(futures)):
+                target_date = futures[future]
+                try:
+                    _, reports, failed = future.result()
+                except Exception as e:  # 목록 첫 페이지 HttpError 등으로 shard 전체가 실패하면 다시 돌 날짜로 남긴다
+                    self.logger.critical(f'[ERROR] backfill shard {target_date}\n{e}')
+                    reports, failed = 0, {'shard'}
+                self.__report(target_date, reports, failed, i + 1, len(shards))
+
+        self.db_manager.invalidate_cache(['executive'])
+        for target_date, failed in sorted(self.failed.items()):
+            self.logger.info(f"[backfill] {target_date} retry needed: {', '.join(failed)}")
+        self.logger.info(f"[backfill] {start_date} ~ {end_date} finished: {self.reports} reports, "
+                         f"{len(self.failed)} shards with failures")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('start_date')
+    parser.add_argument('end_date')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--reset', action='store_true', help='checkpoint를 지우고 처음부터 다시 돈다')
+    args = parser.parse_args()
+
+    if len(args.start_date) != 8 or len(args.end_date) != 8:
+        print('[WARNING] date SHOULD BE LENGTH OF 8')
+        sys.exit(0)
+    if int(args.start_date) > int(args.end_date):
+        print('[WARNING] end_date SHOULD BE LATER THAN start_date')
+        sys.exit(0)
+
+    if args.reset and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+    Backfill().run(args.start_date, args.end_date, args.workers)
@@ -0,0 +1,83 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+
+import gzip
+import json
+import time
+import argparse
+
+import numpy as np
+from pandas import DataFrame
+
+from manager.krx import MARKET_NAMES, TICKER_COLUMNS, decode_tickers
+
+FIXTURE_FILE = os.path.dirname(os.path.realpath(__file__)) + '/fixtures/krx/MDCSTAT01501.json.gz'
+TARGET_DATE = '20210302'
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def decode_tickers_legacy(rows, market, target_date):
+    """
+    기존 Krx.get_ticker_info의 DataFrame 경로 (전 컬럼 regex replace + to_dict + row별 dict)
+    """
+    df = DataFrame(rows)
+    df = df[['MKT_NM', 'ISU_ABBRV', 'ISU_SRT_CD', 'TDD_OPNPRC', 'TDD_HGPRC', 'TDD_LWPRC', 'TDD_CLSPRC', 'ACC_TRDVOL', 'ACC_TRDVAL', 'MKTCAP', 'LIST_SHRS']]
+    df.columns = ['market', 'corp_name', 'stock_code', 'open', 'high', 'low', 'close', 'volume', 'quote_volume', 'market_capitalization', 'operating_share']
+    df = df.replace(r'[^-\w\.]', '', regex=True)
+    df = df.replace(r'\-$', '0', regex=True)
+    df = df.replace('', '0')
+    df = df.set_index('stock_code')
+    df = df.astype({
+        'open': np.int64, 'high': np.int64, 'low': np.int64, 'close': np.int64, 'volume': np.int64,
+        'quote_volume': np.int64, 'market_capitalization': np.int64, 'operating_share': np.int64})
+    tickers = df.sort_values(by='market_capitalization', ascending=False).to_dict('index').items()
+    return [{
+        'stock_code': k, 'business_date': target_date, 'open': v.get('open'), 'high': v.get('high'), 'low': v.get('low'),
+        'close': v.get('close'), 'volume': v.get('volume'), 'quote_volume': v.get('quote_volume'),
+        'market_capitalization': v.get('market_capitalization'), 'market': market, 'market_rank': i + 1,
+        'market_ratio': v.get('market_ratio'), 'operating_share': v.get('operating_share'), 'created_at': None,
+    } for i, (k, v) in enumerate(tickers)]
+
+
+class KrxBench:
+    """
+    저장해둔 KRX 전종목 시세로 시장별 decode 속도를 기존 DataFrame 경로 / decode_tickers 별로 비교한다.
+    """
+    def __init__(self, fixture_file=FIXTURE_FILE):
+        with gzip.open(fixture_file, 'rt', encoding='utf-8') as f:
+            rows = json.load(f).get('OutBlock_1')
+        self.markets = {m: [r for r in rows if r.get('MKT_NM') in names] for m, names in MARKET_NAMES.items()}
+
+    def measure(self, func, rows, market, repeat):
+        elapsed = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(rows, market, TARGET_DATE)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        return elapsed
+
+    def run(self, repeat):
+        print(f"{'market':<10}{'rows':>6}{'legacy p50':>12}{'vector p50':>12}{'speedup':>9}  same")
+        for market, rows in self.markets.items():
+            columns = TICKER_COLUMNS[:-1]  # created_at 제외
+            legacy = [tuple(t[c] for c in columns) for t in decode_tickers_legacy(rows, market, TARGET_DATE)]
+            same = legacy == [t[:-1] for t in decode_tickers(rows, market, TARGET_DATE)]
+
+            legacy_p50 = percentile(self.measure(decode_tickers_legacy, rows, market, repeat), 50)
+            vector_p50 = percentile(self.measure(decode_tickers, rows, market, repeat), 50)
+            print(f"{market:<10}{len(rows):>6}{legacy_p50:>12.2f}{vector_p50:>12.2f}{legacy_p50 / vector_p50:>8.1f}x  {'ok' if same else 'DIFF'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixture', default=FIXTURE_FILE)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    KrxBench(args.fixture).run(args.repeat)
@@ -0,0 +1,100 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+
+import re
+import time
+import argparse
+from datetime import datetime
+
+from manager.dart_report import find_report_rows, normalize_rows
+from utils.config import REASON_CODE, STOCK_TYPE_CODE
+
+FIXTURE_DIR = os.path.dirname(os.path.realpath(__file__)) + '/fixtures/dart/'
+
+COL_NAMES = ['reason_code', 'traded_on', 'stock_type', 'before_volume', 'delta_volume', 'after_volume', 'unit_price', 'remark']
+COL_TYPES = ['text', 'date', 'text', 'volume', 'volume', 'volume', 'price', 'text']
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def convert_valid_format(text, text_type):
+    """
+    기존 Dart.convert_valid_format
+    """
+    if text_type == 'text':
+        return re.compile('[^가-힣]+').sub('', text)
+
+    if text_type == 'date':
+        text = re.compile('[^0-9]+').sub('', text)
+        return datetime.strptime(text, '%Y%m%d')
+
+    if text_type == 'volume':
+        text = '0' if text == '-' else text
+        text = re.compile('(?!^-)[^-|0-9]+').sub('', text)
+        return 0 if text in ['', '-'] else int(text)
+
+    if text_type == 'price':
+        text = '0.0' if text == '-' else text
+        text = text.replace('.', ',', text.count('.') - 1) if text.count('.') > 1 else text
+        text = re.compile('[^0-9.]').sub('', text)
+        return 0.0 if text in ['', '-'] else float(text)
+
+
+def normalize_rows_legacy(rows):
+    """
+    기존 Dart.get_stock_detail의 row 변환 (get_empty_data + 칸마다 convert_valid_format)
+    """
+    normalized = []
+    for row_content in rows:
+        p = {'rcept_no': '', 'disclosed_on': '', 'stock_code': '', 'executive_name': '', 'reason_code': '', 'traded_on': '',
+             'stock_type': '', 'before_volume': '', 'delta_volume': '', 'after_volume': '', 'unit_price': '', 'remark': '', 'created_at': ''}
+        for text, text_type, c_name in zip(row_content, COL_TYPES, COL_NAMES):
+            p[c_name] = convert_valid_format(text, text_type)
+        p['reason_code'] = REASON_CODE.get(p['reason_code']) if REASON_CODE.get(p['reason_code']) else p['reason_code']
+        p['stock_type'] = STOCK_TYPE_CODE.get(p['stock_type']) if STOCK_TYPE_CODE.get(p['stock_type']) else p['stock_type']
+        normalized.append(p)
+    return normalized
+
+
+class NormalizeBench:
+    """
+    fixture 페이지의 보고사유 표 row를 기존 변환 / normalize_rows로 각각 바꿔서 속도와 결과 일치 여부를 찍는다.
+    """
+    def __init__(self, fixture_dir=FIXTURE_DIR):
+        self.rows = {}
+        for file_name in sorted(os.listdir(fixture_dir)):
+            if file_name.endswith('.html'):
+                with open(fixture_dir + file_name, 'r', encoding='utf-8') as f:
+                    self.rows[file_name] = find_report_rows(f.read())
+
+    def measure(self, func, rows, repeat):
+        elapsed = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(rows)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        return elapsed
+
+    def run(self, repeat):
+        print(f"{'fixture':<16}{'rows':>6}{'legacy p50':>12}{'batch p50':>11}{'speedup':>9}  same")
+        for file_name, rows in self.rows.items():
+            legacy = [tuple(p[c] for c in COL_NAMES) for p in normalize_rows_legacy(rows)]
+            same = legacy == [tuple(r) for r in normalize_rows(rows)]
+
+            legacy_p50 = percentile(self.measure(normalize_rows_legacy, rows, repeat), 50)
+            batch_p50 = percentile(self.measure(normalize_rows, rows, repeat), 50)
+            print(f"{file_name:<16}{len(rows):>6}{legacy_p50:>12.3f}{batch_p50:>11.3f}{legacy_p50 / batch_p50:>8.1f}x  {'ok' if same else 'DIFF'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures', default=FIXTURE_DIR)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    NormalizeBench(args.fixtures).run(args.repeat)
@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+
+import time
+import argparse
+
+from bs4 import BeautifulSoup
+
+from manager.dart_report import find_report_rows
+
+FIXTURE_DIR = os.path.dirname(os.path.realpath(__file__)) + '/fixtures/dart/'
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def find_report_rows_bs4(page):
+    """
+    기존 Dart.get_stock_detail의 BeautifulSoup 경로
+    """
+    bs = BeautifulSoup(page, 'html.parser')
+    for t in bs.find_all(lambda tag: tag.name == 'table'):
+        th = t.find(lambda tag: tag.name == 'th')
+        if th and th.text == "보고사유":
+            rows = t.find_all(lambda tag: tag.name == 'tr')
+            return [[r.text for r in row if r.name == 'td'] for row in rows[2:-1]]
+
+
+class ParseBench:
+    """
+    bench/fixtures/dart의 viewer 페이지로 보고사유 표 추출 속도를 lxml / BeautifulSoup 별로 비교한다.
+    두 경로의 추출 결과가 다르면 실패로 표시한다.
+    """
+    def __init__(self, fixture_dir=FIXTURE_DIR):
+        self.pages = {}
+        for file_name in sorted(os.listdir(fixture_dir)):
+            if file_name.endswith('.html'):
+                with open(fixture_dir + file_name, 'r', encoding='utf-8') as f:
+                    self.pages[file_name] = f.read()
+
+    def measure(self, func, page, repeat):
+        elapsed = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(page)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        return elapsed
+
+    def run(self, repeat):
+        print(f"{'fixture':<16}{'KB':>6}{'rows':>6}{'bs4 p50':>10}{'lxml p50':>10}{'speedup':>9}  same")
+        for file_name, page in self.pages.items():
+            rows = find_report_rows(page)
+            same = rows == find_report_rows_bs4(page)
+
+            bs4_p50 = percentile(self.measure(find_report_rows_bs4, page, repeat), 50)
+            lxml_p50 = percentile(self.measure(find_report_rows, page, repeat), 50)
+            print(f"{file_name:<16}{len(page.encode()) // 1024:>6}{len(rows):>6}{bs4_p50:>10.2f}{lxml_p50:>10.2f}"
+                  f"{bs4_p50 / lxml_p50:>8.1f}x  {'ok' if same else 'DIFF'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures', default=FIXTURE_DIR)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    ParseBench(args.fixtures).run(args.repeat)
@@ -0,0 +1,172 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+
+import random
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import pymysql
+
+from manager.db_manager import DbManager
+from utils.commons import get_current_time
+from utils.config import MODE, HOST, USER, PASSWORD, DB, PORT, CHARSET
+
+SEED_TABLES = ['industry', 'corporate', 'executive', 'ticker', 'frequency', 'user', 'trading']
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class QueryBench:
+    """
+    DbManager 조회 메서드마다 latency와 EXPLAIN 결과를 찍는다. (인덱스 회귀 확인용)
+    --seed 옵션은 dev 모드에서만 합성 데이터를 채운다.
+    """
+    def __init__(self):
+        self.db_manager = DbManager()
+        self.conn = pymysql.connect(host=HOST, user=USER, password=PASSWORD, db=DB, port=PORT, charset=CHARSET, autocommit=True)
+
+        self.captured = []
+        execute = self.db_manager._DbManager__execute
+
+        def capture(query):
+            self.captured.append(query)
+            return execute(query)
+        self.db_manager._DbManager__execute = capture
+
+    def get_business_days(self, years):
+        end = datetime.strptime(get_current_time('%Y%m%d'), '%Y%m%d')
+        day, days = end - timedelta(days=365 * years), []
+        while day <= end:
+            if day.weekday() < 5:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def seed(self, years, stocks, reports_per_day):
+        if MODE != 'dev':
+            print('[WARNING] seed is only allowed in dev mode')
+            sys.exit(1)
+
+        with self.conn.cursor() as cur:
+            for table in SEED_TABLES:
+                cur.execute(f'DELETE FROM {table}')
+
+        now, rnd = get_current_time(), random.Random(0)
+        days = self.get_business_days(years)
+        codes = [f'{i:06d}' for i in range(1, stocks + 1)]
+        industries = [f'{i}' for i in range(1, 81)]
+
+        self.db_manager.insert_chunked('industry', [
+            {'industry_code': c, 'industry_name': f'업종{c}', 'created_at': now, 'order_id': i + 1} for i, c in enumerate(industries)])
+        self.db_manager.insert_chunked('corporate', [{
+            'stock_code': c, 'corp_code': f'00{c}', 'corp_name': f'회사{c}', 'corp_shorten_name': '',
+            'industry_code': rnd.choice(industries), 'is_validated': True, 'market': rnd.choice(['KOSPI', 'KOSDAQ']),
+            'market_capitalization': str(rnd.randint(10, 10000) * 100000000), 'market_rank': i + 1, 'updated_at': now} for i, c in enumerate(codes)])
+        self.db_manager.insert_chunked('user', [{
+            'chat_id': str(100000 + i), 'nickname': f'user{i}', 'role': '02', 'is_paid': True, 'is_active': True,
+            'created_at': now, 'expired_at': now + timedelta(days=365), 'canceled_at': None} for i in range(1000)])
+        self.db_manager.insert_chunked('trading', [{
+            'stock_code': rnd.choice(codes), 'buy_date': rnd.choice(days), 'buy_price': 10000, 'sell_price': None, 'sell_date': None,
+            'last_price': None, 'profit_ratio': None, 'last_updated_at': now} for _ in range(50)])
+
+        with self.db_manager.bulk_writer('ticker', commit_every=20) as ticker_writer, \
+                self.db_manager.bulk_writer('executive', commit_every=20) as executive_writer, \
+                self.db_manager.bulk_writer('frequency', commit_every=20) as frequency_writer:
+            for day in days:
+                print(f'[seed] {day.strftime("%Y%m%d")}', end='\r')
+                ticker_writer.add([{
+                    'stock_code': c, 'business_date': day, 'open': 10000, 'high': rnd.randint(10000, 13000), 'low': 9000,
+                    'close': rnd.randint(9000, 13000), 'volume': rnd.randint(0, 10 ** 6), 'quote_volume': rnd.randint(0, 10 ** 10),
+                    'market_capitalization': rnd.randint(10, 10000) * 100000000, 'market': 'KOSPI', 'market_rank': i + 1,
+                    'market_ratio': None, 'operating_share': 10 ** 7, 'created_at': now} for i, c in enumerate(codes)])
+
+                for n in range(reports_per_day):
+                    stock_code = rnd.choice(codes)
+                    executive_writer.add([{
+                        'rcept_no': f'{day.strftime("%Y%m%d")}{n:06d}', 'disclosed_on': day, 'stock_code': stock_code,
+                        'executive_name': f'임원{rnd.randint(1, 20)}', 'reason_code': rnd.choice(['01', '02', '10', '13']),
+                        'traded_on': day, 'stock_type': rnd.choice(['01', '01', '02']), 'before_volume': 1000,
+                        'delta_volume': rnd.randint(-5000, 5000), 'after_volume': 1000, 'unit_price': 10000.0,
+                        'remark': '', 'created_at': now} for _ in range(rnd.randint(1, 4))])
+
+                frequency_writer.add([{
+                    'business_date': day, 'period': 'W', 'stock_code': c, 'count': rnd.randint(1, 5), 'created_at': now}
+                    for c in rnd.sample(codes, min(50, len(codes)))])
+        print(f'\n[seed] {len(days)} business days x {stocks} stocks loaded')
+
+    def get_cases(self):
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT MAX(business_date) FROM ticker")
+            last = cur.fetchone()[0] or get_current_time()
+            cur.execute("SELECT e.stock_code, e.executive_name, c.corp_name FROM executive AS e "
+                        "JOIN corporate AS c ON e.stock_code = c.stock_code ORDER BY e.rcept_no DESC LIMIT 1")
+            stock_code, executive_name, corp_name = cur.fetchone() or ('000001', '', '')
+            cur.execute("SELECT chat_id, nickname FROM user LIMIT 1")
+            chat_id, nickname = cur.fetchone() or ('0', '')
+
+        day = last.strftime('%Y%m%d')
+        week_ago = (last - timedelta(days=7)).strftime('%Y%m%d')
+        return [
+            ('get_disclosure_data', (day, day)),
+            ('get_disclosure_data', (week_ago, day)),
+            ('get_industry_list', ()),
+            ('select_ticker_info', (day,)),
+            ('is_valid_nickname', (nickname,)),
+            ('get_user_info', (chat_id,)),
+            ('get_targets', ()),
+            ('get_corporate_info', (corp_name,)),
+            ('get_tg_detail_data', (corp_name, day)),
+            ('get_tg_company_data', (corp_name, 10)),
+            ('get_tg_executive_data', (corp_name, executive_name, 10)),
+            ('get_business_dates', ()),
+            ('get_last_business_date', (day, 6)),
+            ('get_highest_price', (day,)),
+            ('get_frequency_info', ('W', day)),
+            ('get_ticker_info', (stock_code, day)),
+            ('get_total_corporates', ()),
+            ('get_holding_trades', ()),
+            ('get_stock_code', (corp_name,)),
+            ('get_trading_data', (stock_code, day)),
+        ]
+
+    def explain(self, query):
+        with self.conn.cursor(pymysql.cursors.DictCursor) as cur:
+            cur.execute(f'EXPLAIN {query}')
+            return [f"{r.get('table')}:{r.get('type')}:{r.get('key') or '-'}:{r.get('rows')}" for r in cur.fetchall()]
+
+    def run(self, repeat):
+        print(f"{'method':<26}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}  explain(table:type:key:rows)")
+        for name, args in self.get_cases():
+            func = getattr(DbManager, name)
+            func = getattr(func, '__wrapped__', func)  # 캐시를 거치지 않고 DB를 직접 때린다
+
+            elapsed = []
+            for _ in range(repeat):
+                self.captured = []
+                started = time.perf_counter()
+                func(self.db_manager, *args)
+                elapsed.append((time.perf_counter() - started) * 1000)
+
+            plans = ' | '.join(p for q in self.captured for p in self.explain(q))
+            print(f"{name:<26}{percentile(elapsed, 50):>10.2f}{percentile(elapsed, 95):>10.2f}{max(elapsed):>10.2f}  {plans}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', action='store_true')
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--stocks', type=int, default=2500)
+    parser.add_argument('--reports', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    b = QueryBench()
+    if args.seed:
+        b.seed(args.years, args.stocks, args.reports)
+    b.run(args.repeat)
@@ -1,26 +1,33 @@
+import sys
 import threading
 from collections import defaultdict
 
 from utils.commons import get_current_time
-from utils.config import MINIMUM_TOTAL_AMOUNT
+from utils.config import MINIMUM_TOTAL_AMOUNT, SNAPSHOT_EXPORT
 from manager.log_manager import LogManager
 from manager.db_manager import DbManager
+from manager.business_calendar import BusinessCalendar
 from manager.tg_manager import TgManager
 from manager.dart import Dart
 from manager.naver import Naver
-from manager.krx import Krx
+from manager.krx import Krx, TICKER_COLUMNS
+from manager.price_store import PriceStore
+from manager.snapshot import SnapshotExporter
 
 NO_DATA_MSG = "{target_date}에는 거래내역 없습니다."
+CORP_CODE_DIGEST = 'corp_code'  # source_digest.name
 
 
 class DataFactory:
     def __init__(self):
         self.logger = LogManager().logger
         self.db_manager = DbManager()
+        self.calendar = BusinessCalendar()
         self.tg_manager = TgManager()
         self.dart = Dart()
         self.naver = Naver()
         self.krx = Krx()
+        self.price_store = PriceStore()
 
     def get_empty_corporate(self):
         corporate = {
@@ -50,7 +57,7 @@ class DataFactory:
         return _corporates
 
     def insert_corp_frequency(self, end_date):
-        start_date = self.db_manager.get_last_business_date(end_date, 6)
+        start_date = self.calendar.get_last_business_date(end_date, 6)
         data = self.db_manager.get_disclosure_data(start_date, end_date)
 
         groupby_rcept = defaultdict(list)
@@ -69,6 +76,51 @@ class DataFactory:
         frequency_data = [{'business_date': end_date, 'period': 'W', 'stock_code': k, 'count': len(v), 'created_at': get_current_time()} for k, v in corp_frequency.items()]
         self.db_manager.insert_bulk_row('frequency', frequency_data)
 
+    def __load_corporates(self, base):
+        """
+        DB에 있는 회사(stock_code, corp_code, corp_name). 비어 있거나 읽다가 실패하면 None
+        """
+        try:
+            corporates = [dict(base, stock_code=sc, corp_code=cc, corp_name=cn)
+                          for batch in self.db_manager.stream_table('corporate', ['stock_code', 'corp_code', 'corp_name'])
+                          for sc, cc, cn in batch]
+        except Exception as e:
+            self.logger.critical(f'[ERROR] load corporates from DB\n{e}')
+            return None
+        return corporates or None
+
+    def build_corporates(self):
+        """
+        corpCode 파일이 지난번(source_digest)과 같으면 파싱하지 않고 DB에 있는 회사를 그대로 쓴다.
+        DB에서 못 읽으면 corpCode를 다시 파싱한다.
+        """
+        base = self.get_empty_corporate()
+        corporates, digest = self.dart.build_corporate_list(base, self.db_manager.get_digest(CORP_CODE_DIGEST))
+        if corporates is None:
+            corporates = self.__load_corporates(base)
+            if corporates:
+                self.logger.info(f"corpCode unchanged ({digest}), reuse corporates in DB")
+            else:
+                self.logger.info(f"corpCode unchanged ({digest}) but no corporates in DB, parse again")
+                corporates, digest = self.dart.build_corporate_list(base)
+        return corporates, digest
+
+    def export_snapshot(self):
+        if not SNAPSHOT_EXPORT:
+            return
+        try:
+            SnapshotExporter(self.db_manager, self.logger).export()
+        except Exception as e:
+            self.logger.critical(f'[ERROR] export snapshot\n{e}')
+
+    def run_intraday(self):
+        """
+        장중에 cron으로 몇 분마다 돌려서 새로 올라온 임원 공시만 넣는다.
+        """
+        self.dart.insert_executive_incremental()
+        self.db_manager.invalidate_cache(['executive'])
+        self.logger.info(f"{get_current_time('%Y%m%d %H:%M')} intraday executive loaded")
+
     def run(self):
         target_date = get_current_time('%Y%m%d')
         self.logger.info(f"{target_date} Data Factory Start!")
@@ -76,53 +128,70 @@ class DataFactory:
         tg_msg = f"💌 DATA FACTORY\n\n"
 
         # [step1] update_industry from naver
-        self.naver.update_industry()
+        if self.naver.update_industry():  # 바뀐 업종이 없으면 DB도 캐시도 건드리지 않는다
+            self.db_manager.invalidate_cache(['industry'])
         step1_msg = "[step1] update_industry from naver"
         tg_msg += f"{step1_msg}\n"
         self.logger.info(f"{step1_msg}")
 
         # [step2] bulk insert executive
         self.dart.insert_executive(target_date)
+        self.db_manager.invalidate_cache(['executive'])
         step2_msg = "[step2] bulk insert executive"
         tg_msg += f"{step2_msg}\n"
         self.logger.info(f"{step2_msg}")
 
-        tickers = self.krx.get_ticker_info(target_date)  # check if market opened
-        if not tickers:
+        if not self.krx.is_market_opened(target_date):  # 이날 KRX snapshot을 받아두고 step4에서 그대로 쓴다
+            self.export_snapshot()
             tg_msg += f"\n\n{target_date} Partially Loaded:)"
             threading.Thread(target=self.tg_manager.send_warning_message, args=(tg_msg,)).start()
             return
 
         # [step3] calculate the number of apperances by company (7days)
         self.insert_corp_frequency(target_date)
+        self.db_manager.invalidate_cache(['frequency'])
         step3_msg = "[step3] calculate_corp_frequency"
         tg_msg += f"{step3_msg}\n"
         self.logger.info(f"{step3_msg}")
 
         # [step4] bulk insert ticker
-        markets = ["KOSPI", "KOSDAQ"]
-        for market in markets:
-            tickers = self.krx.get_ticker_info(target_date, market)
-            if not self.db_manager.insert_bulk_row('ticker', tickers):
-                return
+        tickers = self.krx.get_market_tickers(target_date)
+        if not self.db_manager.load_ticker(tickers, TICKER_COLUMNS):
+            return
+        self.calendar.add(target_date)
+        self.db_manager.invalidate_cache(['ticker'])
+        try:
+            self.price_store.append(target_date, tickers, TICKER_COLUMNS)  # 없으면 ticker 테이블로 새로 만든다
+        except Exception as e:  # price store는 ticker에서 언제든 다시 만들 수 있으므로 daily run을 멈추지 않는다
+            self.logger.critical(f'[ERROR] update price store {target_date}\n{e}')
         step4_msg = "[step4] bulk insert ticker"
         tg_msg += f"{step4_msg}\n"
         self.logger.info(f"{step4_msg}")
 
         # [step5] bulk insert corporate
-        self.db_manager.unvalidate_corporates()
-        corporates = self.dart.build_corporate_list(self.get_empty_corporate())  # from dart
+        corporates, corp_code_digest = self.build_corporates()  # from dart
         corporates = self.naver.fill_industry_corporate(corporates)  # from naver
         corporates = self.fill_ticker_corporate(corporates, target_date)  # from ticker
-        self.db_manager.update_or_insert_corporate([tuple(c.values()) for c in corporates])
+        if not self.db_manager.replace_corporates(corporates):  # unvalidate + upsert를 staging 테이블에서 하고 한 번에 교체
+            return
+        self.db_manager.set_digest(CORP_CODE_DIGEST, corp_code_digest)  # corporate가 바뀐 뒤에만 남긴다
+        self.db_manager.invalidate_cache(['corporate'])
         step5_msg = "[step5] bulk insert corporate"
         tg_msg += f"{step5_msg}\n"
         self.logger.info(f"{step5_msg}")
 
+        self.export_snapshot()
+        self.db_manager.dump_query_stats()
         tg_msg += f"\n\n{target_date} Fully Loaded:)"
         threading.Thread(target=self.tg_manager.send_warning_message, args=(tg_msg,)).start()
 
 
 if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) >= 2 else 'daily'
     d = DataFactory()
-    d.run()
+    if mode == 'intraday':
+        d.run_intraday()
+    elif mode == 'daily':
+        d.run()
+    else:
+        print('[WARNING] invalid mode !! Only [daily|intraday]')
@@ -1,7 +1,7 @@
-import requests
 import json
-from urllib.request import urlopen
+from io import BytesIO
 
+from manager.http_manager import HttpManager
 from utils.config import CRTFC_KEY
 
 BASE_URL = 'https://opendart.fss.or.kr/api'
@@ -14,15 +14,14 @@ class ApiManager:
         return cls.instance
 
     def __init__(self):
-        self.session = requests.session()
+        self.http_manager = HttpManager()
 
     def get_json(self, api, p):
         p['crtfc_key'] = CRTFC_KEY
-        url_parameter = '&'.join([f'{key}={value}' for key, value in p.items()])
-        resp = self.session.get(f'{BASE_URL}/{api}.json?{url_parameter}')
+        resp = self.http_manager.get(f'{BASE_URL}/{api}.json', 'dart_api', params=p)
         return json.loads(resp.text)
 
     def get_xml(self, api, p):
         p['crtfc_key'] = CRTFC_KEY
-        url_parameter = '&'.join([f'{key}={value}' for key, value in p.items()])
-        return urlopen(f'{BASE_URL}/{api}.xml?{url_parameter}')
+        resp = self.http_manager.get(f'{BASE_URL}/{api}.xml', 'dart_api', params=p)
+        return BytesIO(resp.content)
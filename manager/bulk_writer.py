@@ -0,0 +1,220 @@
+from contextlib import contextmanager
+
+import pymysql
+
+from manager.query_stats import QueryTimer
+
+
+class BulkWriter:
+    """
+    여러 row를 chunk_size 단위의 multi-row INSERT로 묶어서 쓴다.
+    커넥션 하나로 트랜잭션을 유지하고, commit_every개의 chunk마다 commit 한다. (None이면 close 시 한 번)
+    chunk마다 SAVEPOINT를 잡아서 실패한 chunk만 되돌리고 failures에 남긴다. (atomic이면 chunk 하나만 실패해도 트랜잭션 전체를 되돌린다)
+    deadlock이나 커넥션 끊김처럼 트랜잭션 자체가 깨지면 commit 안 된 row를 모두 failures에 남기고 그 뒤로는 쓰지 않는다.
+    예외는 올리지 않으므로 호출하는 쪽은 failures로 성공 여부를 본다.
+    record가 있으면 chunk / execute / commit마다 QueryTimer를 method 이름으로 넘겨서 쿼리 통계에 남긴다.
+    """
+    def __init__(self, pool, logger, table, columns=None, chunk_size=1000, commit_every=None, suffix='', method=None, record=None, atomic=False):
+        self.pool = pool
+        self.logger = logger
+        self.table = table
+        self.columns = list(columns) if columns else None
+        self.chunk_size = chunk_size
+        self.commit_every = commit_every
+        self.suffix = suffix
+        self.method = method or f'bulk_{table}'
+        self.record = record
+        self.atomic = atomic
+
+        self.conn = None
+        self.cur = None
+        self.pending = []  # (row tuple, tag)
+        self.query = None
+        self.chunks = 0
+        self.uncommitted = 0
+        self.written = 0
+        self.failures = []
+        self.aborted = False
+        self.uncommitted_rows = 0
+        self.uncommitted_tags = set()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    @contextmanager
+    def __timed(self, query, rows=0):
+        timer = QueryTimer(self.method, query)
+        try:
+            yield timer
+        except Exception:
+            timer.failed = True
+            raise
+        finally:
+            timer.acquired_at = timer.acquired_at or timer.started
+            timer.finished()
+            timer.rows = timer.rows or rows
+            if self.record:
+                self.record(timer)
+
+    def open(self):
+        try:
+            with self.__timed('BEGIN') as timer:  # 커넥션 대기 시간은 여기서 잡힌다
+                self.conn = self.pool.acquire()
+                timer.acquired()
+                self.cur = self.conn.cursor()
+                self.conn.begin()
+        except Exception as e:  # PoolTimeout, 접속 실패
+            self.__fail_transaction(0, set(), e)
+
+    def __get_query(self, n_rows):
+        placeholder = f'({", ".join(["%s"] * len(self.columns))})'
+        query = f'INSERT INTO {self.table} ({", ".join(self.columns)}) VALUES {", ".join([placeholder] * n_rows)}'
+        return f'{query} {self.suffix}' if self.suffix else query
+
+    def add(self, rows, tag=None, keep_together=False):
+        """
+        keep_together면 rows를 한 chunk에 몰아 넣는다. (chunk_size를 넘으면 그 chunk만 커진다)
+        같은 tag의 row가 한쪽 chunk만 commit 되는 일이 없어진다.
+        """
+        if keep_together:
+            rows = list(rows)
+            if self.pending and len(self.pending) + len(rows) > self.chunk_size:
+                self.flush()
+
+        for row in rows:
+            if isinstance(row, dict):
+                if self.columns is None:
+                    self.columns = list(row.keys())
+                row = tuple(row[c] for c in self.columns)
+            self.pending.append((row, tag))
+
+            if not keep_together and len(self.pending) >= self.chunk_size:
+                self.flush()
+
+        if keep_together and len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        chunk, self.pending = self.pending, []
+        tags = set(t for _, t in chunk if t is not None)
+        if self.aborted:
+            self.failures.append({'chunk': self.chunks, 'rows': len(chunk), 'tags': sorted(tags), 'error': 'transaction aborted'})
+            return
+
+        if len(chunk) == self.chunk_size:
+            self.query = self.query or self.__get_query(self.chunk_size)
+            query = self.query
+        else:
+            query = self.__get_query(len(chunk))
+
+        self.chunks += 1
+        try:
+            with self.__timed(query, len(chunk)):
+                self.cur.execute('SAVEPOINT bulk_chunk')
+                self.cur.execute(query, [v for row, _ in chunk for v in row])
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:  # deadlock(1213), 커넥션 끊김은 chunk만 되돌릴 수 없다
+            self.__fail_transaction(len(chunk), tags, e)
+            return
+        except Exception as e:
+            if self.atomic:  # 일부만 commit 되면 안 되는 쓰기(replace_ticker, sync_industry)
+                self.__fail_transaction(len(chunk), tags, e)
+                return
+            try:
+                self.cur.execute('ROLLBACK TO SAVEPOINT bulk_chunk')
+            except Exception as rollback_error:
+                self.__fail_transaction(len(chunk), tags, rollback_error)
+                return
+            self.failures.append({'chunk': self.chunks, 'rows': len(chunk), 'tags': sorted(tags), 'error': str(e)})
+            self.logger.critical(f'[Error in bulk insert] {self.table} chunk {self.chunks} ({len(chunk)} rows)\n{e}\n\ntags : {sorted(tags)}')
+            return
+
+        self.written += len(chunk)
+        self.uncommitted += 1
+        self.uncommitted_rows += len(chunk)
+        self.uncommitted_tags |= tags
+        if self.commit_every and self.uncommitted >= self.commit_every:
+            try:
+                with self.__timed('COMMIT'):
+                    self.conn.commit()
+                self.conn.begin()
+            except Exception as e:
+                self.__fail_transaction(0, set(), e)
+                return
+            self.uncommitted = self.uncommitted_rows = 0
+            self.uncommitted_tags = set()
+
+    def __fail_transaction(self, rows, tags, e):
+        """
+        트랜잭션이 통째로 되돌려진 경우. 아직 commit 안 된 chunk까지 실패로 남기고 커넥션을 버린다.
+        """
+        tags = sorted(self.uncommitted_tags | tags)
+        self.failures.append({'chunk': self.chunks, 'rows': rows + self.uncommitted_rows, 'tags': tags, 'error': str(e)})
+        self.logger.critical(f'[Error in bulk insert] {self.table} transaction aborted at chunk {self.chunks} '
+                             f'({rows + self.uncommitted_rows} rows)\n{e}\n\ntags : {tags}')
+        self.written -= self.uncommitted_rows
+        self.uncommitted = self.uncommitted_rows = 0
+        self.uncommitted_tags = set()
+        self.aborted = True
+        self.__rollback()
+        self.__release(True)
+
+    def execute(self, query, args=None):
+        """
+        같은 트랜잭션에서 쿼리를 하나 실행한다. 실패하면 트랜잭션 전체를 되돌리고 failures에 남긴 뒤 None
+        """
+        self.flush()
+        if self.aborted:
+            return None
+        try:
+            with self.__timed(query) as timer:
+                timer.rows = self.cur.execute(query, args)
+                return timer.rows
+        except Exception as e:
+            self.__fail_transaction(0, set(), e)
+            return None
+
+    def close(self):
+        try:
+            self.flush()
+            if self.aborted:  # 커넥션은 이미 버렸다
+                return
+            with self.__timed('COMMIT'):
+                self.conn.commit()
+        except Exception as e:
+            self.__fail_transaction(0, set(), f'commit failed: {e}')
+        finally:
+            self.__release(False)
+
+    def abort(self):
+        self.__rollback()
+        self.__release(True)
+
+    def __rollback(self):
+        try:
+            self.conn.rollback()
+        except Exception:
+            pass
+
+    def __release(self, broken):
+        if self.conn is None:
+            return
+        try:
+            self.cur.close()
+        except Exception:
+            pass
+        self.pool.release(self.conn, broken)
+        self.conn = self.cur = None
+
+    def failed_tags(self):
+        return sorted(set(t for f in self.failures for t in f['tags']))
@@ -0,0 +1,99 @@
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, date
+
+from manager.log_manager import LogManager
+from manager.db_manager import DbManager
+from utils.commons import get_current_time
+from utils.config import CALENDAR_REFRESH_SECONDS
+
+
+class BusinessCalendar:
+    """
+    ticker 테이블의 영업일 목록을 정렬된 리스트로 들고 있으면서 bisect로 조회한다.
+    처음 조회할 때 한 번 전체를 읽고, 이후에는 CALENDAR_REFRESH_SECONDS마다 새로 추가된 날짜만 읽어온다.
+    """
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(BusinessCalendar, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self):
+        if hasattr(self, 'dates'):
+            return
+        self.logger = LogManager().logger
+        self.db_manager = DbManager()
+        self.lock = threading.Lock()
+        self.dates = []
+        self.refreshed_at = None
+
+    def __to_datetime(self, value):
+        if value is None:
+            value = get_current_time('%Y%m%d')
+        if isinstance(value, str):
+            return datetime.strptime(value, '%Y%m%d')
+        if isinstance(value, datetime):
+            return datetime(value.year, value.month, value.day)
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        raise ValueError(f'invalid business date: {value}')
+
+    def refresh(self):
+        with self.lock:
+            last = self.dates[-1] if self.dates else None
+            rows = self.db_manager.get_business_dates(last)
+            if rows is None:  # 조회 실패 시 기존 목록을 유지하고 다음 주기에 다시 시도한다
+                return
+            dates = list(self.dates)  # 조회 중인 스레드가 있으므로 새 리스트로 바꿔 끼운다
+            for r in rows:
+                self.__insert(dates, self.__to_datetime(r.get('business_date')))
+            self.dates = dates
+            self.refreshed_at = time.monotonic()
+            self.logger.debug(f'business calendar refreshed: {len(self.dates)} dates')
+
+    def __ensure_fresh(self):
+        if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= CALENDAR_REFRESH_SECONDS:
+            self.refresh()
+
+    def __insert(self, dates, business_date):
+        i = bisect_left(dates, business_date)
+        if i == len(dates) or dates[i] != business_date:
+            dates.insert(i, business_date)
+
+    def add(self, business_date):
+        with self.lock:
+            dates = list(self.dates)
+            self.__insert(dates, self.__to_datetime(business_date))
+            self.dates = dates
+
+    def get_last_business_date(self, end_date=None, delta=1):
+        """
+        end_date(포함) 이전 delta번째 영업일. 없으면 None
+        """
+        self.__ensure_fresh()
+        dates = self.dates
+        i = bisect_right(dates, self.__to_datetime(end_date)) - delta
+        return dates[i] if 0 <= i < len(dates) else None
+
+    def get_first_business_date(self):
+        """
+        가장 오래된 영업일. 없으면 None
+        """
+        self.__ensure_fresh()
+        dates = self.dates
+        return dates[0] if dates else None
+
+    def is_business_date(self, target_date):
+        self.__ensure_fresh()
+        dates, target_date = self.dates, self.__to_datetime(target_date)
+        i = bisect_left(dates, target_date)
+        return i < len(dates) and dates[i] == target_date
+
+    def get_business_dates(self, start_date, end_date=None):
+        """
+        start_date ~ end_date (양 끝 포함) 사이의 영업일 목록
+        """
+        self.__ensure_fresh()
+        dates = self.dates
+        return dates[bisect_left(dates, self.__to_datetime(start_date)):bisect_right(dates, self.__to_datetime(end_date))]
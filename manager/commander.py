@@ -5,6 +5,7 @@ import threading
 from datetime import datetime
 
 from manager.db_manager import DbManager
+from manager.business_calendar import BusinessCalendar
 from manager.log_manager import LogManager
 from manager.tg_manager import TgManager
 from manager.msg_manager import MsgManager
@@ -21,6 +22,7 @@ class Commander:
     def __init__(self):
         self.logger = LogManager().logger
         self.db_manager = DbManager()
+        self.calendar = BusinessCalendar()
         self.tg_manager = TgManager()
         self.msg_manager = MsgManager()
 
@@ -381,7 +383,7 @@ class Commander:
         )
 
         time.sleep(2.5)
-        last_business_date = convert_to_str(self.db_manager.get_last_business_date(), '%Y%m%d')
+        last_business_date = convert_to_str(self.calendar.get_last_business_date(), '%Y%m%d')
         tg_msg = self.msg_manager.get_snoop_message(last_business_date)
         context.dispatcher.run_async(
             self.__log_and_notify,
@@ -584,6 +586,13 @@ class Commander:
             tg_targets = set([t.get('chat_id') for t in tg_targets])
             threading.Thread(target=self.tg_manager.send_all_message, args=(tg_targets, content,)).start()
 
+    def tg_dbstats(self, update, context):
+        if str(update.message.chat_id) not in ADMIN_IDS:
+            return
+
+        tg_msg = f'[DB query stats]\n{self.db_manager.dump_query_stats()}\n\n[DB pool]\n{self.db_manager.get_pool_stats()}'
+        threading.Thread(target=self.tg_manager.send_warning_message, args=(tg_msg,)).start()
+
     # TODO.
     def tg_mail(self, update, context):
         # 회원정보 받고
@@ -1,30 +1,35 @@
-import requests
 import time
 import re
 import threading
 from datetime import datetime
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 
 from zipfile import ZipFile
-from io import BytesIO
 import xml.etree.ElementTree as Et
 
-from bs4 import BeautifulSoup
-
 from manager.log_manager import LogManager
 from manager.db_manager import DbManager
 from manager.tg_manager import TgManager
 from manager.api_manager import ApiManager
-from utils.config import REASON_CODE, STOCK_TYPE_CODE
-from utils.commons import get_current_time, convert_to_str
+from manager.http_manager import HttpManager
+from manager.ingest_context import IngestContext
+from manager.dart_report import find_report_rows, normalize_rows
+from utils.config import DART_WORKERS
+from utils.commons import get_current_time
 
 NO_DATA_MSG = "[DART] 조회된 데이터가 없습니다."
+EXECUTIVE_WATERMARK = 'executive'
+EXECUTIVE_COLUMNS = ['rcept_no', 'disclosed_on', 'stock_code', 'executive_name', 'reason_code', 'traded_on', 'stock_type',
+                     'before_volume', 'delta_volume', 'after_volume', 'unit_price', 'remark', 'created_at']
+EXECUTIVE_LIST_PARAMS = {'pblntf_ty': 'D', 'pblntf_detail_ty': 'D002'}  # 지분공시 > 임원ㆍ주요주주특정증권등소유상황보고서
 
 API_URL = 'https://opendart.fss.or.kr/api'
 MAIN_URL = "https://dart.fss.or.kr"
 REPORT = "/dsaf001/main.do?rcpNo={rcept_no}"
 SNOOP = "/report/viewer.do?dtd=dart3.xsd&eleId=4&offset=1&length=1&rcpNo={rcept_no}&dcmNo={dcm_no}"
 
+BUTTON_ONCLICK = re.compile(r"""<button[^>]*?onclick=(["'])(.*?)\1""", re.S)
+
 
 class Dart:
     def __new__(cls):
@@ -37,174 +42,260 @@ class Dart:
         self.db_manager = DbManager()
         self.tg_manager = TgManager()
         self.api_manager = ApiManager()
+        self.http_manager = HttpManager()
 
-    def convert_valid_format(self, text, text_type):
-        if text_type == 'text':
-            return re.compile('[^가-힣]+').sub('', text)
-
-        if text_type == 'date':
-            text = re.compile('[^0-9]+').sub('', text)
-            return datetime.strptime(text, '%Y%m%d')
-
-        if text_type == 'volume':
-            text = '0' if text == '-' else text
-            text = re.compile('(?!^-)[^-|0-9]+').sub('', text)
-            return 0 if text in ['', '-'] else int(text)
-
-        if text_type == 'price':
-            text = '0.0' if text == '-' else text
-            text = text.replace('.', ',', text.count('.') - 1) if text.count('.') > 1 else text  # 오타 방지를 위해 마지막 .만 소수점으로 처리
-            text = re.compile('[^0-9.]').sub('', text)
-            return 0.0 if text in ['', '-'] else float(text)
+    def extract_dcm_no(self, html):
+        """
+        div.rightWrap 안 첫 번째 button의 onclick에서 dcmNo를 꺼낸다. (파싱 트리 없이 문자열 검색)
+        """
+        start = html.find('rightWrap')
+        m = BUTTON_ONCLICK.search(html, start) if start >= 0 else None
+        if not m:
+            return None
+        args = m.group(2).split(' ')
+        return args[1].replace("'", '').replace(');', '') if len(args) > 1 else None
+
+    def has_report_table(self, resp):
+        try:
+            find_report_rows(resp.text)
+        except ValueError:
+            return False
+        return True
 
     def get_dcm_no(self, _rcept_no):
-        r = requests.get(MAIN_URL + REPORT.format(rcept_no=_rcept_no))
-        for b in [a.get('onclick') for a in BeautifulSoup(r.text, 'html.parser').find('div', class_='rightWrap').find_all('button')][:1]:
-            return b.split(' ')[1].replace("'", '').replace(');', '')
-
-    def get_target_table(self, _tables):
-        for t in _tables:
-            th = t.find(lambda tag: tag.name == 'th')
-            if th and th.text == "보고사유":
-                return t
-
-    def get_empty_data(self, _rcept_no, _rcept_dt, _stock_code, _executive_name):
-        p = {
-            'rcept_no': _rcept_no,
-            'disclosed_on': datetime.strptime(_rcept_dt, "%Y%m%d"),
-            'stock_code': _stock_code,
-            'executive_name': _executive_name,
-            'reason_code': '',
-            'traded_on': '',
-            'stock_type': '',
-            'before_volume': '',
-            'delta_volume': '',
-            'after_volume': '',
-            'unit_price': '',
-            'remark': '',
-            'created_at': get_current_time()
-        }
-        return p
+        # dcmNo가 없는 페이지(점검, 요청 제한, 아직 문서가 안 붙은 공시)는 캐시에 남기지 않는다
+        r = self.http_manager.get(MAIN_URL + REPORT.format(rcept_no=_rcept_no), 'dart_viewer',
+                                  validate=lambda resp: self.extract_dcm_no(resp.text) is not None)
+        return self.extract_dcm_no(r.text)
 
-    def get_stock_detail(self, _rcept_no, _dcm_no, _rcept_dt, _stock_code, _executive_name):
-        stock_detail = []
-        r = requests.get(MAIN_URL + SNOOP.format(rcept_no=_rcept_no, dcm_no=_dcm_no))
-        time.sleep(1)
-
-        bs = BeautifulSoup(r.text, 'html.parser')
-        table = self.get_target_table(bs.findAll(lambda tag: tag.name == 'table'))
-        rows = table.findAll(lambda tag: tag.name == 'tr')
-
-        col_names = ['reason_code', 'traded_on', 'stock_type', 'before_volume',
-                     'delta_volume', 'after_volume', 'unit_price', 'remark']
-        col_types = ['text', 'date', 'text', 'volume', 'volume', 'volume', 'price', 'text']
-
-        last_business_date = convert_to_str(self.db_manager.get_last_business_date(), '%Y%m%d')
-        highest_price = self.db_manager.get_highest_price(last_business_date)
-        for row in rows[2:-1]:
-            row_content = [r.text for r in row if r.name == 'td']
-            p = self.get_empty_data(_rcept_no, _rcept_dt, _stock_code, _executive_name)
-
-            for text, text_type, c_name in zip(row_content, col_types, col_names):
-                p[c_name] = self.convert_valid_format(text, text_type)
-
-            p['reason_code'] = REASON_CODE.get(p['reason_code']) if REASON_CODE.get(p['reason_code']) else p[
-                'reason_code']
-            p['stock_type'] = STOCK_TYPE_CODE.get(p['stock_type']) if STOCK_TYPE_CODE.get(p['stock_type']) else p[
-                'stock_type']
+    def get_stock_detail(self, _rcept_no, _dcm_no, _rcept_dt, _stock_code, _executive_name, _context):
+        """
+        EXECUTIVE_COLUMNS 순서의 tuple 목록을 돌려준다.
+        """
+        r = self.http_manager.get(MAIN_URL + SNOOP.format(rcept_no=_rcept_no, dcm_no=_dcm_no), 'dart_viewer',
+                                  validate=self.has_report_table)  # 속도 제한은 HttpManager가 한다. 보고사유 표가 있는 페이지만 캐시
 
-            if p['unit_price'] <= highest_price:  # unit_price parsing 문제로, 전일 최고가보다 낮은 기격의 공시만 인정한다.
-                stock_detail.append(p)
+        head = (_rcept_no, datetime.strptime(_rcept_dt, "%Y%m%d"), _stock_code, _executive_name)
+        created_at = get_current_time()
 
+        stock_detail = []
+        for row in normalize_rows(find_report_rows(r.text)):
+            if _context.is_valid_price(_stock_code, row.unit_price):  # unit_price parsing 문제로, 직전 영업일 가격대 안의 공시만 인정한다.
+                stock_detail.append(head + row + (created_at,))
+            else:
+                self.logger.info(f"[WARNING] {_rcept_no} {_stock_code} unit_price {row.unit_price} out of band")
         return stock_detail
 
-    def parsing(self, data):
-        stock_diff = {}
-        for i, d in enumerate(data):
-            dcm_no = self.get_dcm_no(d.get('rcept_no'))
-            self.logger.info(f"parsing: {d.get('rcept_no')} -> {i + 1} / {len(data)}")
-            if d.get('flr_nm') == '국민연금공단':  # 공단 일괄 공시하여... 삭제한다. 20210207
-                continue
-            stock_diff[d.get('rcept_no')] = self.get_stock_detail(d.get('rcept_no'), dcm_no,
-                                                                  d.get('rcept_dt'), d.get('stock_code'), d.get('flr_nm'))
-
+    def __parse_report(self, d, dcm_nos, new_dcm_nos, context):
+        rcept_no = d.get('rcept_no')
+        dcm_no = dcm_nos.get(rcept_no)
+        if not dcm_no:
+            dcm_no = self.get_dcm_no(rcept_no)
+            if not dcm_no:
+                raise ValueError(f'dcm_no not found in {rcept_no}')
+            new_dcm_nos[rcept_no] = dcm_no
+        return self.get_stock_detail(rcept_no, dcm_no, d.get('rcept_dt'), d.get('stock_code'), d.get('flr_nm'), context)
+
+    def parsing(self, targets, context):
+        """
+        보고서를 DART_WORKERS개 스레드로 동시에 가져온다. (요청 속도는 dart_viewer rate limit이 제한)
+        결과는 입력 순서대로 담고, 실패한 공시는 로그만 남기고 뺀다.
+        """
+        dcm_nos = self.db_manager.get_dcm_nos([d.get('rcept_no') for d in targets])  # 이미 아는 공시는 main.do 요청을 건너뛴다
+        new_dcm_nos = {}
+
+        stock_diff, failed = {}, []
+        with ThreadPoolExecutor(max_workers=DART_WORKERS) as executor:
+            futures = [(d.get('rcept_no'), executor.submit(self.__parse_report, d, dcm_nos, new_dcm_nos, context)) for d in targets]
+            for i, (rcept_no, future) in enumerate(futures):
+                try:
+                    stock_diff[rcept_no] = future.result()
+                except Exception as e:
+                    failed.append(rcept_no)
+                    self.logger.critical(f'[ERROR] parsing {rcept_no}\n{e}')
+                    continue
+                self.logger.info(f"parsing: {rcept_no} -> {i + 1} / {len(targets)}")
+
+        self.db_manager.save_dcm_nos(new_dcm_nos)
+        if failed:
+            tg_msg = f"[ERROR] parsing failed - {len(failed)} / {len(targets)}\n" + '\n'.join(failed)
+            threading.Thread(target=self.tg_manager.send_warning_message, args=(tg_msg,)).start()
         return stock_diff
 
-    def build_corporate_list(self, base_corporate):
-        corporates = []
+    def iter_corporates(self, zf):
+        """
+        corpCode.xml을 zip member에서 바로 iterparse 하면서 stock_code가 있는 회사만 (stock_code, corp_code, corp_name)으로 넘긴다.
+        """
+        for info in zf.infolist():
+            with zf.open(info) as f:
+                context = Et.iterparse(f, events=('start', 'end'))
+                _, root = next(context)
+                for event, elem in context:
+                    if event != 'end' or elem.tag != 'list':
+                        continue
+                    stock_code = elem.findtext('stock_code') or ''
+                    if stock_code.strip():  # stock_code 있는 경우만
+                        yield stock_code, elem.findtext('corp_code'), elem.findtext('corp_name')
+                    root.clear()  # 읽은 list는 바로 버려서 메모리를 일정하게 유지한다
+
+    def get_corp_code_digest(self, zf):
+        return '-'.join(f'{info.CRC:08x}{info.file_size:x}' for info in zf.infolist())
+
+    def build_corporate_list(self, base_corporate, last_digest=None):
+        """
+        (corporates, digest)를 돌려준다. 받은 corpCode 파일 내용(zip CRC)이 last_digest와 같으면 corporates는 None
+        """
         resp = self.api_manager.get_xml('corpCode', {})
-        with ZipFile(BytesIO(resp.read())) as zf:
-            file_list = zf.namelist()
-            while len(file_list) > 0:
-                file_name = file_list.pop()
-                xml = zf.open(file_name).read().decode()
-                tree = Et.fromstring(xml)
-                stock_list = tree.findall("list")
-
-                stock_code = [x.findtext("stock_code") for x in stock_list]
-                corp_code = [x.findtext("corp_code") for x in stock_list]
-                corp_name = [x.findtext("corp_name") for x in stock_list]
-
-                for sc, cc, cn in zip(stock_code, corp_code, corp_name):
-                    if sc.replace(" ", ""):  # stock_code 있는 경우만
-                        base = deepcopy(base_corporate)
-                        base['stock_code'] = sc
-                        base['corp_code'] = cc
-                        base['corp_name'] = cn
-                        corporates.append(base)
-                return corporates
+        with ZipFile(resp) as zf:
+            digest = self.get_corp_code_digest(zf)
+            if digest == last_digest:
+                return None, digest
+            return [dict(base_corporate, stock_code=sc, corp_code=cc, corp_name=cn) for sc, cc, cn in self.iter_corporates(zf)], digest
 
     def __get_executive_data(self, data):
         """
         임원 관련 보고서와 유가, 코스닥 데이터만 가지고 온다.
+        국민연금공단은 일괄 공시하여... 제외한다. 20210207 (받지 않으므로 실패로 세지도 않는다)
         """
-        f = lambda x: x.get('report_nm') == '임원ㆍ주요주주특정증권등소유상황보고서' and x.get('corp_cls') in ['Y', 'K']
+        f = lambda x: x.get('report_nm') == '임원ㆍ주요주주특정증권등소유상황보고서' and x.get('corp_cls') in ['Y', 'K'] \
+            and x.get('flr_nm') != '국민연금공단'
         return [d for d in data if f(d)]
 
-    def insert_executive(self, _start_date=None, _end_date=None):
-        if not _start_date:
-            _start_date = get_current_time('%Y%m%d', -1)
-        if not _end_date:
-            _end_date = _start_date
-
-        params = {
-            'bgn_de': _start_date,
-            'end_de': _end_date,
-            'page_count': 100
-        }
+    def __get_page(self, params, page_no):
+        response = self.api_manager.get_json('list', dict(params, page_no=page_no))
+        if response['status'] != '000':
+            raise ValueError(f"list page {page_no} status code - {response['status']}")
+        return response['list']
 
+    def __get_list(self, params, watermark=None):
+        """
+        list API를 전 페이지 가져온다. (최신순) 첫 페이지로 total_page를 알고 나머지 페이지는 동시에 받는다.
+        watermark가 있고 첫 페이지가 이미 watermark까지 내려가면 나머지 페이지는 받지 않는다.
+        조회 실패는 None, 데이터 없음은 []
+        """
+        params = dict(params, sort='date', sort_mth='desc')
         response = self.api_manager.get_json('list', params)
         if response['status'] not in ['000', '013']:
             tg_msg = f"[ERROR] status code - {response['status']}"
             self.logger.info(tg_msg)
             threading.Thread(target=self.tg_manager.send_warning_message, args=(tg_msg,)).start()
-            return
+            return None
 
         if response['status'] == '013':
             self.logger.info(NO_DATA_MSG)
-            return
+            return []
 
         data, total_page = response['list'], response['total_page']
-        for i in range(2, total_page + 1):
-            self.logger.info(f"{_start_date} ~ {_end_date}: current page {i} / {total_page}")
-            time.sleep(0.5)  # to prevent IP ban
+        if watermark and data and data[-1].get('rcept_no') <= watermark:
+            return data
+
+        with ThreadPoolExecutor(max_workers=DART_WORKERS) as executor:  # 요청 간격은 dart_api rate limit이 지킨다
+            futures = [executor.submit(self.__get_page, params, i) for i in range(2, total_page + 1)]
+            try:
+                for future in futures:
+                    data += future.result()
+            except Exception as e:  # 빠진 페이지가 있으면 watermark/receipt가 틀어지므로 전체를 실패로 본다
+                tg_msg = f"[ERROR] list {params['bgn_de']} ~ {params['end_de']}\n{e}"
+                self.logger.info(tg_msg)
+                threading.Thread(target=self.tg_manager.send_warning_message, args=(tg_msg,)).start()
+                return None
+        return data
+
+    def __get_executive_list(self, params, watermark=None):
+        """
+        임원ㆍ주요주주 소유보고(D002)만 유가(Y), 코스닥(K)별로 서버에서 걸러서 받는다.
+        """
+        started = time.perf_counter()
+        data = []
+        for corp_cls in ['Y', 'K']:
+            rows = self.__get_list(dict(params, corp_cls=corp_cls, **EXECUTIVE_LIST_PARAMS), watermark)
+            if rows is None:
+                return None
+            data += rows
+
+        data.sort(key=lambda d: d.get('rcept_no'), reverse=True)
+        self.logger.info(f"list {params['bgn_de']} ~ {params['end_de']}: {len(data)} reports in {time.perf_counter() - started:.2f}s")
+        return data
+
+    def __ingest(self, data, end_date):
+        """
+        dart_receipt에 없는 임원 공시만 파싱해서 executive와 dart_receipt에 한 트랜잭션으로 넣는다.
+        (새로 처리한 공시 수, 처리하지 못한 rcept_no 집합)을 돌려준다.
+        """
+        executive_data = self.__get_executive_data(data)
+        processed = self.db_manager.get_processed_receipts([d.get('rcept_no') for d in executive_data])
+        if processed is None:
+            return 0, set(d.get('rcept_no') for d in executive_data)
+
+        targets = [d for d in executive_data if d.get('rcept_no') not in processed]
+        self.logger.info(f"executive reports: {len(targets)} new / {len(executive_data)} listed")
+        if not targets:
+            return 0, set()
+
+        context = IngestContext(end_date)  # 공시마다 DB를 보지 않도록 기준 시세를 한 번만 읽는다
+        parsed = self.parsing(targets, context)
+
+        with self.db_manager.bulk_writer('executive', EXECUTIVE_COLUMNS) as writer:  # 여러 공시를 한 트랜잭션으로 chunk 단위 insert
+            for rcept, detail in parsed.items():
+                if detail:
+                    writer.add(detail, rcept, keep_together=True)  # 공시 하나가 두 chunk에 나뉘면 절반만 남을 수 있다
+            writer.flush()
+
+            failed = writer.failed_tags()
+            receipts = [{
+                'rcept_no': d.get('rcept_no'),
+                'rcept_dt': datetime.strptime(d.get('rcept_dt'), '%Y%m%d'),
+                'stock_code': d.get('stock_code'),
+                'row_count': len(parsed[d.get('rcept_no')]),
+                'processed_at': get_current_time()
+            } for d in targets if d.get('rcept_no') in parsed and d.get('rcept_no') not in failed]
+            self.db_manager.record_receipts(writer, receipts)
+
+        self.logger.info(f"DB insert executive: {writer.written} rows in {writer.chunks} chunks")
+        failed = set(parsed) if writer.aborted else writer.failed_tags()  # 트랜잭션이 통째로 되돌려졌으면 receipt도 없다
+        if writer.aborted:
+            receipts = []
+        if failed:
+            tg_msg = f"[ERROR] bulk insert in executive - {len(failed)} rcept failed\n" + '\n'.join(failed)
+            self.logger.info(tg_msg)
+            threading.Thread(target=self.tg_manager.send_warning_message, args=(tg_msg,)).start()
+        return len(receipts), set(d.get('rcept_no') for d in targets if d.get('rcept_no') not in parsed) | set(failed)
+
+    def insert_executive(self, _start_date=None, _end_date=None):
+        """
+        (새로 처리한 공시 수, 실패한 rcept_no 집합)을 돌려준다. list 조회 자체가 실패하면 None
+        """
+        if not _start_date:
+            _start_date = get_current_time('%Y%m%d', -1)
+        if not _end_date:
+            _end_date = _start_date
 
-            params['page_no'] = i
-            response = self.api_manager.get_json('list', params)
-            if response['status'] != '000':
-                continue
+        params = {
+            'bgn_de': _start_date,
+            'end_de': _end_date,
+            'page_count': 100
+        }
 
-            data += response['list']
+        data = self.__get_executive_list(params)
+        if data is None:
+            return None
+        return self.__ingest(data, _end_date) if data else (0, set())
 
-        executive_data = self.__get_executive_data(data)
-        parsed = self.parsing(executive_data)
+    def insert_executive_incremental(self):
+        """
+        오늘 공시 중 watermark 이후 것만 받아서 넣는다. 장중 몇 분 간격으로 돌려도 된다.
+        watermark는 실패한 공시 직전까지만 올려서 다음 실행에서 다시 받는다.
+        """
+        today = get_current_time('%Y%m%d')
+        watermark = self.db_manager.get_watermark(EXECUTIVE_WATERMARK)
 
-        for rcept, detail in parsed.items():
-            stock_detail = [d for d in detail]
-            if not stock_detail:
-                continue
+        data = self.__get_executive_list({'bgn_de': today, 'end_de': today, 'page_count': 100}, watermark)
+        if not data:
+            return
 
-            self.logger.debug(f"DB insert on {rcept}")
-            if not self.db_manager.insert_bulk_row('executive', stock_detail):  # 공시번호 단위 bulk insert
-                self.logger.info(f'[ERROR] insert_bulk_row in executive - {rcept}')
-                return
+        _, failed = self.__ingest(data, today)
+        rcept_nos = sorted(d.get('rcept_no') for d in data if not watermark or d.get('rcept_no') > watermark)
+        if failed:
+            rcept_nos = [r for r in rcept_nos if r < min(failed)]
+        if rcept_nos:
+            self.db_manager.set_watermark(EXECUTIVE_WATERMARK, rcept_nos[-1])
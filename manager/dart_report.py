@@ -0,0 +1,80 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from collections import namedtuple
+
+from lxml import html as lxml_html
+
+from utils.config import REASON_CODE, STOCK_TYPE_CODE
+
+REPORT_TABLE_TITLE = '보고사유'
+PARSER = lxml_html.HTMLParser(encoding='utf-8')  # str에 XML 선언이 있어도 파싱되도록 bytes로 넘긴다
+
+
+def find_report_rows(page):
+    """
+    DART viewer 페이지에서 첫 번째 th가 '보고사유'인 표를 찾아 본문 행의 td 텍스트 목록을 돌려준다.
+    앞의 헤더 2줄과 마지막 합계 줄은 뺀다. (BeautifulSoup 경로와 같은 결과)
+    """
+    doc = lxml_html.fromstring(page.encode('utf-8'), parser=PARSER)
+    for table in doc.iter('table'):
+        th = table.xpath('(.//th)[1]')
+        if th and th[0].text_content() == REPORT_TABLE_TITLE:
+            rows = table.xpath('.//tr')
+            return [[td.text_content() for td in row if td.tag == 'td'] for row in rows[2:-1]]
+    raise ValueError(f'{REPORT_TABLE_TITLE} table not found')
+
+
+ReportRow = namedtuple('ReportRow', ['reason_code', 'traded_on', 'stock_type', 'before_volume',
+                                     'delta_volume', 'after_volume', 'unit_price', 'remark'])
+
+NOT_HANGUL = re.compile('[^가-힣]+')
+NOT_DIGIT = re.compile('[^0-9]+')
+NOT_VOLUME = re.compile('(?!^-)[^-|0-9]+')
+NOT_PRICE = re.compile('[^0-9.]')
+
+
+def to_text(text):
+    return NOT_HANGUL.sub('', text)
+
+
+@lru_cache(maxsize=4096)
+def to_date(text):
+    text = NOT_DIGIT.sub('', text)
+    if len(text) == 8:
+        return datetime(int(text[:4]), int(text[4:6]), int(text[6:]))
+    return datetime.strptime(text, '%Y%m%d')
+
+
+def to_volume(text):
+    text = '0' if text == '-' else NOT_VOLUME.sub('', text)
+    return 0 if text in ('', '-') else int(text)
+
+
+def to_price(text):
+    if text == '-':
+        return 0.0
+    dots = text.count('.')
+    if dots > 1:  # 오타 방지를 위해 마지막 .만 소수점으로 처리
+        text = text.replace('.', ',', dots - 1)
+    text = NOT_PRICE.sub('', text)
+    return 0.0 if text in ('', '-') else float(text)
+
+
+CONVERTERS = (to_text, to_date, to_text, to_volume, to_volume, to_volume, to_price, to_text)
+
+
+def normalize_rows(rows):
+    """
+    find_report_rows 결과를 한 번에 ReportRow로 바꾼다. 보고사유/주식 종류는 코드로 바꾸고, 없는 칸은 ''로 둔다.
+    """
+    n_columns = len(CONVERTERS)
+    normalized = []
+    for cells in rows:
+        values = [convert(text) for convert, text in zip(CONVERTERS, cells)]
+        if len(values) < n_columns:
+            values += [''] * (n_columns - len(values))
+        values[0] = REASON_CODE.get(values[0]) or values[0]
+        values[2] = STOCK_TYPE_CODE.get(values[2]) or values[2]
+        normalized.append(ReportRow._make(values))
+    return normalized
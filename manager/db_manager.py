@@ -1,7 +1,22 @@
+import os
+import sys
+import inspect
+import tempfile
+from contextlib import contextmanager
+from collections import namedtuple
+from datetime import datetime
+
 import pymysql.cursors
 
 from manager.log_manager import LogManager
+from manager.db_pool import DbPool
+from manager.bulk_writer import BulkWriter
+from manager.query_cache import QueryCache, cached
+from manager.query_stats import QueryStats, QueryTimer
+from manager.snapshot import SqliteBackend, snapshot_read
 from utils.config import HOST, USER, PASSWORD, DB, PORT, CHARSET
+from utils.config import DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_MAX_IDLE, DB_POOL_PING_INTERVAL, BULK_CHUNK_SIZE, STREAM_FETCH_SIZE
+from utils.config import CACHE_USER_TTL, LOCAL_INFILE, SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN
 from utils.commons import get_current_time
 
 
@@ -13,88 +28,314 @@ class DbManager:
 
     def __init__(self):
         self.logger = LogManager().logger
-        self.conn = None
+        if not hasattr(self, 'pool'):  # singleton이라 __init__이 여러 번 불려도 풀은 하나만 만든다
+            self.pool = DbPool(self.__connect, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_MAX_IDLE, DB_POOL_PING_INTERVAL)
+            self.query_stats = QueryStats()
+            self.snapshot = SqliteBackend()
+
+    def use_snapshot(self, mode):
+        """
+        봇 프로세스에서만 켠다. mode: 'off' | 'snapshot' | 'local'
+        """
+        self.snapshot = SqliteBackend(mode)
+        self.logger.info(f'storage backend: {mode}')
 
     def __connect(self):
+        # 조회는 autocommit으로 바로 끝내고, 쓰기는 begin()/commit()으로 트랜잭션을 직접 연다
         return pymysql.connect(host=HOST,
                                user=USER,
                                password=PASSWORD,
                                db=DB,
                                port=PORT,
-                               charset=CHARSET)
-
-    def __execute(self, query):
-        self.conn = self.__connect()
-        cur = self.conn.cursor(pymysql.cursors.DictCursor)
+                               charset=CHARSET,
+                               autocommit=True,
+                               local_infile=LOCAL_INFILE)
+
+    def get_pool_stats(self):
+        return self.pool.get_stats()
+
+    def get_cache_stats(self):
+        return QueryCache.get_all_stats()
+
+    def invalidate_cache(self, tables=None):
+        """
+        tables에 걸린 조회 캐시를 비우고, 다른 프로세스(봇)도 비우도록 알린다.
+        """
+        QueryCache.invalidate_tables(tables)
+        QueryCache.broadcast()
+
+    def get_query_stats(self):
+        return self.query_stats.get_summary()
+
+    def dump_query_stats(self):
+        summary = self.query_stats.format_summary()
+        self.logger.info(f'[query stats]\n{summary}')
+        return summary
+
+    def __caller(self):
+        """
+        스택을 거슬러 올라가 처음 만나는 DbManager 공개 메서드 이름. (__load_staging 같은 helper는 건너뛴다)
+        """
+        frame = sys._getframe(2)
+        while frame is not None:
+            method = PUBLIC_METHODS.get(frame.f_code)
+            if method:
+                return method
+            frame = frame.f_back
+        return sys._getframe(2).f_code.co_name
+
+    @contextmanager
+    def __connection(self, method, query):
+        timer = QueryTimer(method, query)
+        try:
+            with self.pool.connection() as conn:
+                timer.acquired()
+                yield conn, timer
+        except Exception:
+            timer.failed = True
+            raise
+        finally:
+            timer.finished()
+            self.__record(timer)
+
+    def __record(self, timer):
+        is_slow = timer.elapsed_ms >= SLOW_QUERY_MS
+        self.query_stats.record(timer, is_slow)
+        if not is_slow:
+            return
+
+        msg = f'[slow query] {timer.method} {timer.elapsed_ms:.1f}ms (acquire {timer.acquire_ms:.1f}ms, rows {timer.rows})'
+        msg += f'\n\nQuery : {timer.query}'
+        if SLOW_QUERY_EXPLAIN and timer.query.lstrip().upper().startswith('SELECT'):
+            msg += f'\n\nExplain : {self.__explain(timer.query)}'
+        self.logger.warning(msg)
+
+    def __explain(self, query):
         try:
-            cur.execute(query)
-            result = cur.fetchall()
+            with self.pool.connection() as conn:
+                with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                    cur.execute(f'EXPLAIN {query}')
+                    return cur.fetchall()
         except Exception as e:
-            msg = f'[Error in execute query]\n{e}'
-            msg += f'\n\nQuery : {query}'
-            self.logger.critical(msg)
+            return f'failed - {e}'
 
-            cur.close()
-            self.conn.close()
-            return None
-        
-        cur.close()
-        self.conn.close()
+    def __execute(self, query):
+        with self.__connection(self.__caller(), query) as (conn, timer):
+            cur = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                cur.execute(query)
+                result = cur.fetchall()
+                timer.rows = len(result)
+            except Exception as e:
+                msg = f'[Error in execute query]\n{e}'
+                msg += f'\n\nQuery : {query}'
+                self.logger.critical(msg)
+                timer.failed = True
+                return None
+            finally:
+                cur.close()
         return result
 
     def __execute_values(self, query, values):
-        self.conn = self.__connect()
-        cur = self.conn.cursor(pymysql.cursors.DictCursor)
-        try:
-            cur.executemany(query, values)
-        except Exception as e:
-            msg = f'[Error in execute_values query]\n{e}'
-            msg += f'\n\nQuery : {query}'
-            self.logger.critical(msg)
-
-            cur.close()
-            self.conn.rollback()
-            self.conn.close()
-            return False
-        
-        cur.close()
-        self.conn.commit()
-        self.conn.close()
+        with self.__connection(self.__caller(), query) as (conn, timer):
+            cur = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                conn.begin()
+                cur.executemany(query, values)
+                conn.commit()
+                timer.rows = len(values)
+            except Exception as e:
+                msg = f'[Error in execute_values query]\n{e}'
+                msg += f'\n\nQuery : {query}'
+                self.logger.critical(msg)
+
+                self.__rollback(conn)
+                timer.failed = True
+                return False
+            finally:
+                cur.close()
         return True
 
     def __execute_commit(self, query):
-        self.conn = self.__connect()
-        cur = self.conn.cursor(pymysql.cursors.DictCursor)
-        try:
-            cur.execute(query)
-        except Exception as e:
-            msg = f'[Error in execute_commit query]\n{e}'
-            msg += f'\n\nQuery : {query}'
-            self.logger.critical(msg)
+        with self.__connection(self.__caller(), query) as (conn, timer):
+            cur = conn.cursor(pymysql.cursors.DictCursor)
+            try:
+                conn.begin()
+                timer.rows = cur.execute(query)
+                conn.commit()
+            except Exception as e:
+                msg = f'[Error in execute_commit query]\n{e}'
+                msg += f'\n\nQuery : {query}'
+                self.logger.critical(msg)
+
+                self.__rollback(conn)
+                timer.failed = True
+                return False
+            finally:
+                cur.close()
+        return True
 
-            cur.close()
-            self.conn.rollback()
-            self.conn.close()
-            return False
-        
-        cur.close()
-        self.conn.commit()
-        self.conn.close()
+    def __stream(self, query, batch_size=None, row_mode='dict'):
+        """
+        unbuffered(SS) cursor로 결과를 STREAM_FETCH_SIZE씩 읽어서 넘긴다.
+        batch_size가 있으면 row 리스트 단위로, 없으면 row 단위로 yield 한다.
+        row_mode: 'dict' | 'tuple' | 'namedtuple'
+        중간에 실패하면 로그를 남기고 예외를 그대로 올린다.
+        """
+        return self.__iter_stream(self.__caller(), query, batch_size, row_mode)
+
+    def __iter_stream(self, method, query, batch_size, row_mode):
+        cursor_class = pymysql.cursors.SSDictCursor if row_mode == 'dict' else pymysql.cursors.SSCursor
+        fetch_size = batch_size or STREAM_FETCH_SIZE
+        with self.__connection(method, query) as (conn, timer):
+            cur = conn.cursor(cursor_class)
+            try:
+                cur.execute(query)
+                row_type = None
+                if row_mode == 'namedtuple':
+                    row_type = namedtuple('Row', [d[0] for d in cur.description], rename=True)
+
+                while True:
+                    rows = cur.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    timer.rows += len(rows)
+                    if row_type:
+                        rows = [row_type._make(r) for r in rows]
+                    if batch_size:
+                        yield rows
+                    else:
+                        yield from rows
+            except GeneratorExit:
+                conn.close()  # 중간에 멈추면 남은 결과를 다 읽지 않도록 커넥션을 버린다
+                raise
+            except Exception as e:
+                msg = f'[Error in stream query]\n{e}'
+                msg += f'\n\nQuery : {query}'
+                self.logger.critical(msg)
+                timer.failed = True
+                raise  # 삼키면 호출하는 쪽이 잘린 결과를 전체로 믿는다
+            finally:
+                if conn.open:
+                    cur.close()
+
+    def __execute_script(self, queries):
+        """
+        여러 statement를 한 커넥션에서 순서대로 실행한다. (DDL 포함, 하나라도 실패하면 중단)
+        """
+        with self.__connection(self.__caller(), ';\n'.join(queries)) as (conn, timer):
+            cur = conn.cursor()
+            try:
+                for query in queries:
+                    timer.rows += cur.execute(query)
+            except Exception as e:
+                msg = f'[Error in execute_script query]\n{e}'
+                msg += f'\n\nQuery : {query}'
+                self.logger.critical(msg)
+                timer.failed = True
+                return False
+            finally:
+                cur.close()
+        return True
+
+    def __execute_transaction(self, queries):
+        """
+        여러 DML을 한 트랜잭션으로 실행한다. 하나라도 실패하면 전부 되돌리고 False
+        """
+        with self.__connection(self.__caller(), ';\n'.join(queries)) as (conn, timer):
+            cur = conn.cursor()
+            try:
+                conn.begin()
+                for query in queries:
+                    timer.rows += cur.execute(query)
+                conn.commit()
+            except Exception as e:
+                msg = f'[Error in execute_transaction query]\n{e}'
+                msg += f'\n\nQuery : {query}'
+                self.logger.critical(msg)
+
+                self.__rollback(conn)
+                timer.failed = True
+                return False
+            finally:
+                cur.close()
         return True
 
+    def __to_infile_value(self, value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return '1' if value else '0'
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+    def __load_infile(self, table, rows, columns=None):
+        if columns is None:
+            columns = list(rows[0].keys())
+            rows = (tuple(row[c] for c in columns) for row in rows)
+        with tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False, encoding='utf-8') as f:
+            for row in rows:
+                f.write('\t'.join(self.__to_infile_value(v) for v in row) + '\n')
+        try:
+            query = f"LOAD DATA LOCAL INFILE '{f.name}' INTO TABLE {table} CHARACTER SET utf8mb4 " \
+                    f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(f'`{c}`' for c in columns)})"
+            return self.__execute_commit(query)
+        finally:
+            os.remove(f.name)
+
+    def __load_staging(self, table, rows, columns=None):
+        """
+        table과 같은 구조의 {table}_load 테이블을 비우고 rows를 채운다. (columns를 주면 rows는 그 순서의 tuple)
+        LOCAL_INFILE이면 LOAD DATA LOCAL INFILE, 아니면 chunk 단위 multi-row INSERT로 넣는다.
+        """
+        load_table = f'{table}_load'
+        if not self.__execute_script([f'CREATE TABLE IF NOT EXISTS {load_table} LIKE {table}', f'TRUNCATE TABLE {load_table}']):
+            return None
+        if LOCAL_INFILE:
+            return load_table if self.__load_infile(load_table, rows, columns) else None
+
+        with BulkWriter(self.pool, self.logger, load_table, columns, method=self.__caller(), record=self.__record) as writer:
+            writer.add(rows)
+        return None if writer.failures else load_table
+
+    def __rollback(self, conn):
+        try:
+            conn.rollback()
+        except Exception:  # 끊어진 커넥션은 풀 반납 시 버려진다
+            pass
+
     def delete_table(self, table):
+        QueryCache.invalidate_tables([table])
         query = f"DELETE FROM {table} "
         return self.__execute_commit(query)
 
     def insert_row(self, table, params):
+        QueryCache.invalidate_tables([table])
+        if self.snapshot.serves([table]):
+            return self.snapshot.insert_row(table, params)
         query = f'INSERT INTO {table} ({", ".join(params.keys())}) VALUES ({", ".join(["%s"] * len(params.values()))})'
         return self.__execute_values(query, [tuple(params.values())])
 
     def insert_bulk_row(self, table, params):
+        QueryCache.invalidate_tables([table])
+        if self.snapshot.serves([table]):
+            return self.snapshot.insert_bulk_row(table, params)
         query = f'INSERT INTO {table} ({", ".join(params[0].keys())}) VALUES ({", ".join(["%s"] * len(params[0]))})'
         return self.__execute_values(query, [tuple(p.values()) for p in params])
 
+    def bulk_writer(self, table, columns=None, chunk_size=BULK_CHUNK_SIZE, commit_every=None, suffix='', atomic=False):
+        QueryCache.invalidate_tables([table])
+        return BulkWriter(self.pool, self.logger, table, columns, chunk_size, commit_every, suffix,
+                          method=self.__caller(), record=self.__record, atomic=atomic)
+
+    def insert_chunked(self, table, params, chunk_size=BULK_CHUNK_SIZE, commit_every=None):
+        with self.bulk_writer(table, chunk_size=chunk_size, commit_every=commit_every) as writer:
+            writer.add(params)
+        return not writer.failures
+
     def update_or_insert_corporate(self, data):
+        QueryCache.invalidate_tables(['corporate'])
         query = "INSERT INTO `corporate` " \
               "(`stock_code`, `corp_code`, `corp_name`, `corp_shorten_name`, `industry_code`, `is_validated`, " \
               "`market`, `market_capitalization`, `market_rank`, `updated_at`) " \
@@ -103,43 +344,215 @@ class DbManager:
               "`market` = VALUES(`market`), `market_capitalization` = VALUES(`market_capitalization`), `market_rank` = VALUES(`market_rank`), `updated_at` = VALUES(`updated_at`) "
         return self.__execute_values(query, data)
 
-    def get_disclosure_data(self, start_date, end_date):
+    def load_ticker(self, tickers, columns=None):
+        """
+        staging 테이블에 먼저 적재하고 같은 날짜를 지운 뒤 INSERT ... SELECT 하는 것을 한 트랜잭션으로 ticker에 반영한다.
+        (읽는 쪽은 하루치가 한 번에 보이고, ticker.py가 먼저 넣은 날짜를 다시 넣어도 중복 키로 실패하지 않는다)
+        columns를 주면 tickers는 그 순서의 tuple 목록이다.
+        """
+        if not tickers:
+            return False
+        QueryCache.invalidate_tables(['ticker'])
+        load_table = self.__load_staging('ticker', tickers, columns)
+        if not load_table:
+            return False
+
+        columns = ', '.join(f'`{c}`' for c in (columns or tickers[0].keys()))
+        return self.__execute_transaction([
+            f'DELETE FROM ticker WHERE business_date IN (SELECT DISTINCT business_date FROM {load_table})',
+            f'INSERT INTO ticker ({columns}) SELECT {columns} FROM {load_table}',
+        ])
+
+    def replace_ticker(self, business_date, market, tickers, columns):
+        """
+        (business_date, market) 단위로 지우고 다시 넣는다. 같은 날짜를 몇 번 돌려도 결과가 같다.
+        DELETE나 insert chunk 하나라도 실패하면 전체를 되돌리고 False (지워지기만 하고 덜 채워진 날짜가 남지 않는다)
+        """
+        QueryCache.invalidate_tables(['ticker'])
+        try:
+            with self.bulk_writer('ticker', columns, atomic=True) as writer:
+                if writer.execute("DELETE FROM ticker WHERE business_date = %s AND market = %s", (business_date, market)) is None:
+                    return False  # writer가 이미 트랜잭션을 되돌렸다
+                writer.add(tickers)
+        except Exception as e:
+            self.logger.critical(f'[ERROR] replace_ticker {business_date} {market}\n{e}')
+            return False
+        return not writer.failures
+
+    def sync_industry(self, industries):
+        """
+        지금 industry와 비교해서 바뀐 업종만 한 트랜잭션으로 insert/update/delete 한다.
+        봇은 바뀌기 전/후의 목록만 보고, 바뀐 게 없으면 아무것도 쓰지 않는다.
+        (inserted, updated, deleted) 개수를 돌려주고, 어디서든 실패하면 전체를 되돌리고 None (반만 바뀐 industry는 남지 않는다)
+        """
+        rows = self.__execute("SELECT industry_code, industry_name, order_id FROM industry")
+        if rows is None or not industries:
+            return None
+        current = {r.get('industry_code'): r for r in rows}
+        latest = {i.get('industry_code'): i for i in industries}
+
+        inserted = [i for code, i in latest.items() if code not in current]
+        updated = [i for code, i in latest.items() if code in current and
+                   (i.get('industry_name'), i.get('order_id')) != (current[code].get('industry_name'), current[code].get('order_id'))]
+        deleted = [code for code in current if code not in latest]
+        if not (inserted or updated or deleted):
+            return 0, 0, 0
+
+        try:
+            with self.bulk_writer('industry', ['industry_code', 'industry_name', 'created_at', 'order_id'], atomic=True) as writer:
+                if deleted:  # execute나 insert chunk가 실패하면 writer가 트랜잭션 전체를 되돌리고 failures에 남긴다
+                    writer.execute(f"DELETE FROM industry WHERE industry_code IN ({', '.join(['%s'] * len(deleted))})", deleted)
+                for i in updated:
+                    writer.execute("UPDATE industry SET industry_name = %s, order_id = %s WHERE industry_code = %s",
+                                   (i.get('industry_name'), i.get('order_id'), i.get('industry_code')))
+                writer.add(inserted)
+        except Exception as e:
+            self.logger.critical(f'[ERROR] sync_industry\n{e}')
+            return None
+        if writer.failures:
+            return None
+        return len(inserted), len(updated), len(deleted)
+
+    def replace_corporates(self, corporates):
+        """
+        기존 corporate를 is_validated = False로 복사한 새 테이블에 이번 목록을 upsert 한 뒤 RENAME TABLE로 바꿔 끼운다.
+        봇은 교체 전/후의 corporate만 보게 되고, 전부 unvalidated 된 중간 상태는 보이지 않는다.
+        """
+        if not corporates:
+            return False
+        QueryCache.invalidate_tables(['corporate'])
+        load_table = self.__load_staging('corporate', corporates)
+        if not load_table:
+            return False
+
+        columns = ', '.join(f'`{c}`' for c in corporates[0].keys())
+        queries = [
+            'DROP TABLE IF EXISTS corporate_staging',
+            'CREATE TABLE corporate_staging LIKE corporate',
+            'INSERT INTO corporate_staging SELECT * FROM corporate',
+            'UPDATE corporate_staging SET `is_validated` = False',
+            f'INSERT INTO corporate_staging ({columns}) SELECT {columns} FROM {load_table} AS l '
+            'ON DUPLICATE KEY UPDATE `corp_name` = l.`corp_name`, `industry_code` = l.`industry_code`, `is_validated` = l.`is_validated`, '
+            '`market` = l.`market`, `market_capitalization` = l.`market_capitalization`, `market_rank` = l.`market_rank`, `updated_at` = l.`updated_at`',
+            'DROP TABLE IF EXISTS corporate_old',
+            'RENAME TABLE corporate TO corporate_old, corporate_staging TO corporate',
+            'DROP TABLE corporate_old',
+        ]
+        return self.__execute_script(queries)
+
+    def get_dcm_nos(self, rcept_nos):
+        if not rcept_nos:
+            return {}
+        query = "SELECT rcept_no, dcm_no FROM dart_document WHERE rcept_no IN ({rcept_nos})"
+        query = query.format(rcept_nos=', '.join(f"'{r}'" for r in rcept_nos))
+        return {r.get('rcept_no'): r.get('dcm_no') for r in self.__execute(query) or []}
+
+    def save_dcm_nos(self, dcm_nos):
+        if not dcm_nos:
+            return True
+        rows = [{'rcept_no': k, 'dcm_no': v, 'created_at': get_current_time()} for k, v in dcm_nos.items()]
+        with self.bulk_writer('dart_document', suffix='ON DUPLICATE KEY UPDATE dcm_no = VALUES(dcm_no)') as writer:
+            writer.add(rows)
+        return not writer.failures
+
+    def get_processed_receipts(self, rcept_nos):
+        if not rcept_nos:
+            return set()
+        query = "SELECT rcept_no FROM dart_receipt WHERE rcept_no IN ({rcept_nos})"
+        query = query.format(rcept_nos=', '.join(f"'{r}'" for r in rcept_nos))
+        rows = self.__execute(query)
+        return None if rows is None else set(r.get('rcept_no') for r in rows)
+
+    def record_receipts(self, writer, receipts):
+        """
+        executive insert와 같은 트랜잭션에서 처리한 공시를 dart_receipt에 남긴다.
+        실패하면 writer가 트랜잭션 전체를 되돌리고 writer.aborted로 알려준다.
+        """
+        for i in range(0, len(receipts), BULK_CHUNK_SIZE):
+            chunk = receipts[i:i + BULK_CHUNK_SIZE]
+            query = "INSERT IGNORE INTO dart_receipt (rcept_no, rcept_dt, stock_code, row_count, processed_at) VALUES " + \
+                    ', '.join(['(%s, %s, %s, %s, %s)'] * len(chunk))
+            writer.execute(query, [r.get(c) for r in chunk for c in ('rcept_no', 'rcept_dt', 'stock_code', 'row_count', 'processed_at')])
+
+    def get_watermark(self, name):
+        query = "SELECT rcept_no FROM ingest_watermark WHERE name = '{name}'"
+        query = query.format(name=name)
+        rows = self.__execute(query)
+        return rows[0].get('rcept_no') if rows else None
+
+    def set_watermark(self, name, rcept_no):
+        query = "INSERT INTO ingest_watermark (name, rcept_no, updated_at) VALUES ('{name}', '{rcept_no}', '{updated_at}') " \
+                "ON DUPLICATE KEY UPDATE rcept_no = VALUES(rcept_no), updated_at = VALUES(updated_at)"
+        query = query.format(name=name, rcept_no=rcept_no, updated_at=get_current_time())
+        return self.__execute_commit(query)
+
+    def get_digest(self, name):
+        query = "SELECT digest FROM source_digest WHERE name = '{name}'"
+        query = query.format(name=name)
+        rows = self.__execute(query)
+        return rows[0].get('digest') if rows else None
+
+    def set_digest(self, name, digest):
+        query = "INSERT INTO source_digest (name, digest, updated_at) VALUES ('{name}', '{digest}', '{updated_at}') " \
+                "ON DUPLICATE KEY UPDATE digest = VALUES(digest), updated_at = VALUES(updated_at)"
+        query = query.format(name=name, digest=digest, updated_at=get_current_time())
+        return self.__execute_commit(query)
+
+    def __get_disclosure_query(self, start_date, end_date):
         query = "SELECT e.disclosed_on, e.rcept_no, e.stock_code, e.delta_volume, e.unit_price, c.corp_code, c.corp_name, c.market, c.market_capitalization, c.market_rank, i.industry_name " \
                 "FROM dtnn.executive AS e LEFT JOIN dtnn.corporate AS c ON e.stock_code = c.stock_code " \
                 "LEFT JOIN dtnn.industry AS i ON c.industry_code = i.industry_code " \
                 "WHERE (e.disclosed_on BETWEEN '{start_date}' AND '{end_date}') AND e.reason_code IN ('01', '02') AND e.stock_type IN ('01') " \
                 "AND (c.industry_code is not null and c.market_capitalization != '') "
-        query = query.format(start_date=start_date, end_date=end_date)
-        return self.__execute(query)
+        return query.format(start_date=start_date, end_date=end_date)
+
+    @snapshot_read(['executive', 'corporate', 'industry'])
+    def get_disclosure_data(self, start_date, end_date):
+        return self.__execute(self.__get_disclosure_query(start_date, end_date))
+
+    def stream_disclosure_data(self, start_date, end_date, batch_size=None, row_mode='dict'):
+        query = self.__get_disclosure_query(start_date, end_date)
+        query += "ORDER BY e.disclosed_on ASC, e.rcept_no ASC"
+        return self.__stream(query, batch_size, row_mode)
 
     def unvalidate_corporates(self):
+        QueryCache.invalidate_tables(['corporate'])
         query = 'UPDATE `corporate` ' \
               'SET `is_validated` = False'
         return self.__execute_commit(query)
 
+    @cached(['industry'])
+    @snapshot_read(['industry'])
     def get_industry_list(self):
         query = "SELECT * FROM `industry` ORDER BY order_id ASC"
         return self.__execute(query)
 
+    @snapshot_read(['ticker'])
     def select_ticker_info(self, date):
         query = "SELECT * FROM `ticker` WHERE `business_date` = '{date}'"
         query = query.format(date=date)
         return self.__execute(query)
 
+    @snapshot_read(['user'])
     def is_valid_nickname(self, nickname):
         query = "SELECT * FROM user WHERE nickname = '{nickname}'"
         query = query.format(nickname=nickname)
         return False if self.__execute(query) else True
 
+    @cached(['user'], ttl=CACHE_USER_TTL)
+    @snapshot_read(['user'])
     def get_user_info(self, chat_id):
         query = "SELECT * FROM user WHERE chat_id = '{chat_id}'"
         query = query.format(chat_id=chat_id)
         return self.__execute(query)
 
+    @snapshot_read(['user'])
     def get_targets(self):
         query = f"SELECT chat_id FROM user WHERE is_paid = True AND is_active = True AND expired_at > CURDATE()"
         return self.__execute(query)
 
+    @cached(['corporate'])
+    @snapshot_read(['corporate'])
     def get_corporate_info(self, corp_name):
         query = "SELECT c.corp_name, c.market, c.market_rank, c.market_capitalization " \
               "FROM dtnn.corporate AS c WHERE c.corp_name = '{corp_name}'" \
@@ -147,12 +560,14 @@ class DbManager:
         query = query.format(corp_name=corp_name)
         return self.__execute(query)
 
+    @snapshot_read(['executive', 'corporate'])
     def get_tg_detail_data(self, corp_name, target_date):
         query = "SELECT e.* FROM dtnn.executive AS e LEFT JOIN dtnn.corporate AS c ON e.stock_code = c.stock_code " \
               "WHERE c.corp_name = '{corp_name}' AND e.disclosed_on = '{target_date}'"
         query = query.format(corp_name=corp_name, target_date=target_date)
         return self.__execute(query)
 
+    @snapshot_read(['executive', 'corporate'])
     def get_tg_company_data(self, corp_name, count):
         query = "SELECT * FROM dtnn.executive as e INNER JOIN " \
                 "(SELECT e.rcept_no FROM dtnn.executive AS e " \
@@ -164,6 +579,7 @@ class DbManager:
         query = query.format(corp_name=corp_name, count=count)
         return self.__execute(query)
 
+    @snapshot_read(['executive', 'corporate'])
     def get_tg_executive_data(self, corp_name, executive_name, count):
         query = "SELECT * FROM dtnn.executive as e INNER JOIN " \
                 "(SELECT e.rcept_no FROM dtnn.executive AS e " \
@@ -177,7 +593,22 @@ class DbManager:
         query = query.format(corp_name=corp_name, executive_name=executive_name, count=count)
         return self.__execute(query)
 
-    def get_last_business_date(self, end_date=get_current_time('%Y%m%d'), delta=1):
+    @snapshot_read(['business_date'])
+    def get_business_dates(self, after_date=None):
+        query = "SELECT DISTINCT business_date FROM ticker "
+        if after_date:
+            query += "WHERE business_date > '{after_date}' ".format(after_date=after_date)
+        query += "ORDER BY business_date ASC"
+        return self.__execute(query)
+
+    def get_ticker_stock_codes(self):
+        query = "SELECT DISTINCT stock_code FROM ticker"
+        return self.__execute(query)
+
+    @cached(['ticker'], key=lambda end_date=None, delta=1: (end_date or get_current_time('%Y%m%d'), delta))  # 자정이 지나면 key도 바뀐다
+    @snapshot_read(['business_date'])
+    def get_last_business_date(self, end_date=None, delta=1):
+        end_date = end_date or get_current_time('%Y%m%d')
         query = "SELECT DISTINCT business_date FROM ticker " \
                 "WHERE business_date <= '{end_date}' " \
                 "ORDER BY business_date DESC " \
@@ -185,30 +616,45 @@ class DbManager:
         query = query.format(end_date=end_date, delta=delta)
         return self.__execute(query)[-1].get('business_date')
 
+    @snapshot_read(['ticker'])
     def get_highest_price(self, last_business_date):
         query = "SELECT MAX((high * 1)) AS highest_price FROM ticker " \
                 "WHERE business_date = '{last_business_date}'"
         query = query.format(last_business_date=last_business_date)
         return self.__execute(query)[0].get('highest_price')
 
+    @cached(['frequency'])
+    @snapshot_read(['frequency'])
     def get_frequency_info(self, period, target_date):
         query = "SELECT * FROM frequency WHERE period = '{period}' AND business_date = '{target_date}'"
         query = query.format(period=period, target_date=target_date)
         return self.__execute(query)
 
+    @snapshot_read(['ticker'])
     def get_ticker_info(self, stock_code, target_date):
         query = "SELECT * FROM ticker WHERE stock_code = '{stock_code}' AND business_date = '{target_date}'"
         query = query.format(stock_code=stock_code, target_date=target_date)
         return self.__execute(query)[0]
 
+    @snapshot_read(['corporate'])
     def get_total_corporates(self):
         query = "SELECT * FROM corporate"
         return self.__execute(query)
 
+    def stream_total_corporates(self, batch_size=None, row_mode='dict'):
+        query = "SELECT * FROM corporate"
+        return self.__stream(query, batch_size, row_mode)
+
+    def stream_table(self, table, columns, where='', batch_size=STREAM_FETCH_SIZE):
+        query = f"SELECT {', '.join(f'`{c}`' for c in columns)} FROM `{table}` "
+        query += f"WHERE {where}" if where else ''
+        return self.__stream(query, batch_size, 'tuple')
+
     def get_holding_trades(self):
         query = "SELECT * FROM trading WHERE sell_date IS NULL"
         return self.__execute(query)
 
+    @snapshot_read(['corporate'])
     def get_stock_code(self, corp_name):
         query = "SELECT dtnn.corporate.stock_code FROM dtnn.corporate WHERE dtnn.corporate.corp_name = '{corp_name}'"
         query = query.format(corp_name=corp_name)
@@ -231,4 +677,8 @@ class DbManager:
                 "dtnn.trading.last_updated_at = '{last_updated_at}' " \
                 "WHERE dtnn.trading.stock_code = '{stock_code}' AND DATE_FORMAT(dtnn.trading.buy_date, '%Y%m%d') = '{buy_date}'"
         query = query.format(**params)
-        return self.__execute_commit(query)
\ No newline at end of file
+        return self.__execute_commit(query)
+
+
+PUBLIC_METHODS = {inspect.unwrap(f).__code__: name for name, f in vars(DbManager).items()
+                  if not name.startswith('_') and inspect.isfunction(f)}  # code -> 쿼리 통계에 남길 메서드 이름
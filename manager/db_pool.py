@@ -0,0 +1,152 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class DbPool:
+    """
+    스레드 간에 공유하는 MySQL 커넥션 풀.
+    idle 커넥션은 max_idle 초가 지나면 버리고, ping_interval 초 이상 쉬었으면 꺼낼 때 ping으로 확인한다.
+    """
+    def __init__(self, connect, size, timeout, max_idle, ping_interval):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_interval = ping_interval
+
+        self.idle = deque()  # (conn, released_at)
+        self.opened = 0
+        self.in_use = 0
+        self.cond = threading.Condition()
+
+        self.acquired = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_in_use = 0
+        self.created = 0
+        self.recycled = 0
+        self.timeouts = 0
+
+    def __close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def __is_healthy(self, conn, idle_for):
+        if idle_for < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            with self.cond:
+                while not self.idle and self.opened >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f'no connection available in {self.timeout}s (size={self.size})')
+                    self.cond.wait(remaining)
+
+                if not self.idle:
+                    self.opened += 1
+                    break
+                conn, released_at = self.idle.pop()  # 가장 최근에 반납된 커넥션부터 사용
+
+            # ping은 네트워크를 타므로 lock 밖에서 한다. 꺼낸 커넥션은 opened에 남아 있어 그동안 풀이 넘치지 않는다
+            idle_for = time.monotonic() - released_at
+            if idle_for < self.max_idle and self.__is_healthy(conn, idle_for):
+                with self.cond:
+                    return self.__checkout(conn, started)
+            self.__close(conn)
+            with self.cond:
+                self.opened -= 1
+                self.recycled += 1
+                self.cond.notify()
+
+        try:
+            conn = self.connect()
+        except Exception:
+            with self.cond:
+                self.opened -= 1
+                self.cond.notify()
+            raise
+
+        with self.cond:
+            self.created += 1
+            return self.__checkout(conn, started)
+
+    def __checkout(self, conn, started):
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        if waited >= 0.001:
+            self.waited += 1
+        return conn
+
+    def release(self, conn, broken=False):
+        discard = broken or not conn.open
+        if discard:
+            self.__close(conn)
+        with self.cond:
+            self.in_use -= 1
+            if discard:
+                self.opened -= 1
+            else:
+                self.idle.append((conn, time.monotonic()))
+            self.cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def close_all(self):
+        with self.cond:
+            while self.idle:
+                conn, _ = self.idle.pop()
+                self.opened -= 1
+                self.__close(conn)
+
+    def get_stats(self):
+        with self.cond:
+            return {
+                'size': self.size,
+                'opened': self.opened,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'utilization': round(self.in_use / self.size, 3) if self.size else 0.0,
+                'peak_in_use': self.peak_in_use,
+                'acquired': self.acquired,
+                'waited': self.waited,
+                'wait_avg_ms': round(self.wait_total / self.acquired * 1000, 3) if self.acquired else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'created': self.created,
+                'recycled': self.recycled,
+                'timeouts': self.timeouts,
+            }
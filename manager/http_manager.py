@@ -0,0 +1,109 @@
+import time
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from manager.log_manager import LogManager
+from manager.response_cache import ResponseCache
+from utils.rate_limiter import RateLimiter
+from utils.config import RATE_LIMITS, HTTP_RETRIES, HTTP_BACKOFF, HTTP_TIMEOUT, HTTP_POOL_SIZE, RESPONSE_CACHE_TTL
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+SOURCE_TTL = object()  # cache_ttl 기본값: source별 RESPONSE_CACHE_TTL을 따른다
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpManager:
+    """
+    외부 사이트(DART, KRX, Naver) 요청 공통 처리.
+    source별 RateLimiter와 keep-alive Session을 프로세스 전체가 공유하고, 5xx/429/연결 오류는 지수 backoff로 재시도한다.
+    성공한 응답은 ResponseCache에 남겨서 재실행/재파싱 때 다시 요청하지 않는다.
+    """
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(HttpManager, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self):
+        if hasattr(self, 'limiters'):
+            return
+        self.logger = LogManager().logger
+        self.limiters = {source: RateLimiter(rate, max(1, int(rate))) for source, rate in RATE_LIMITS.items()}
+        self.sessions = {}
+        self.cache = ResponseCache()
+        self.lock = threading.Lock()
+
+    def get_session(self, source):
+        session = self.sessions.get(source)
+        if session is None:
+            with self.lock:
+                session = self.sessions.get(source)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self.sessions[source] = session
+        return session
+
+    def __get_delay(self, attempt, resp):
+        retry_after = resp.headers.get('Retry-After') if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return HTTP_BACKOFF * (2 ** attempt) + random.uniform(0, HTTP_BACKOFF)
+
+    def get_cache_stats(self):
+        return self.cache.get_stats()
+
+    def request(self, method, url, source, cache_ttl=SOURCE_TTL, validate=None, **kwargs):
+        """
+        validate(resp)가 있으면 True인 응답만 캐시에 저장하고, 캐시에서 꺼낸 응답도 다시 확인한다.
+        (점검/요청 제한 안내처럼 200으로 오는 페이지가 만료 없이 남지 않게 한다)
+        """
+        ttl = RESPONSE_CACHE_TTL.get(source, 0) if cache_ttl is SOURCE_TTL else cache_ttl
+        key = None
+        if self.cache.enabled:
+            key = self.cache.get_key(method, url, kwargs.get('params'), kwargs.get('data'))
+            resp = self.cache.get(source, key, ttl)
+            if resp is not None and (validate is None or self.cache.replay or validate(resp)):
+                return resp
+            if self.cache.replay:
+                raise HttpError(f'{method} {url} not in response cache (replay mode)')
+
+        kwargs.setdefault('timeout', HTTP_TIMEOUT)
+        limiter = self.limiters.get(source)
+        session = self.get_session(source)
+
+        for attempt in range(HTTP_RETRIES + 1):
+            if limiter:
+                limiter.acquire()
+
+            resp = None
+            try:
+                resp = session.request(method, url, **kwargs)
+                if resp.status_code not in RETRY_STATUS:
+                    if key and (validate is None or validate(resp)):
+                        self.cache.set(source, key, resp, ttl)
+                    return resp
+                error = f'status code {resp.status_code}'
+            except requests.RequestException as e:
+                error = str(e)
+
+            if attempt == HTTP_RETRIES:
+                break
+            delay = self.__get_delay(attempt, resp)
+            self.logger.info(f'[http] retry {attempt + 1}/{HTTP_RETRIES} in {delay:.1f}s - {source} {url} ({error})')
+            time.sleep(delay)
+
+        raise HttpError(f'{method} {url} failed after {HTTP_RETRIES} retries ({error})')
+
+    def get(self, url, source, **kwargs):
+        return self.request('GET', url, source, **kwargs)
+
+    def post(self, url, source, **kwargs):
+        return self.request('POST', url, source, **kwargs)
@@ -0,0 +1,42 @@
+from manager.db_manager import DbManager
+from manager.business_calendar import BusinessCalendar
+from utils.commons import convert_to_str
+from utils.config import PRICE_BAND_RATIO
+
+
+class IngestContext:
+    """
+    insert_executive 한 번 동안 공유하는 기준 데이터.
+    직전 영업일 종목별 고가를 미리 읽어두고, 공시 단가가 종목 고가보다 크게 높으면 파싱 오류로 보고 거른다.
+    (스톡옵션 행사, 유상/무상증자, CB/BW 전환은 시가보다 낮은 게 정상이라 하한은 두지 않는다)
+    """
+    def __init__(self, end_date=None):
+        self.db_manager = DbManager()
+        self.business_date = BusinessCalendar().get_last_business_date(end_date)
+        self.ceilings = {}  # stock_code -> 허용하는 최고 단가
+        self.highest_price = None
+
+        if self.business_date:
+            rows = self.db_manager.select_ticker_info(convert_to_str(self.business_date, '%Y%m%d')) or []
+            for r in rows:
+                high = self.__to_float(r.get('high'))
+                if high > 0:
+                    self.ceilings[r.get('stock_code')] = high * (1 + PRICE_BAND_RATIO)
+            self.highest_price = max((self.__to_float(r.get('high')) for r in rows), default=None)
+
+    def __to_float(self, value):
+        try:
+            return float(value or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def is_valid_price(self, stock_code, unit_price):
+        if not unit_price:  # 무상증자/상속 등 단가 없는 거래
+            return True
+
+        ceiling = self.ceilings.get(stock_code)
+        if ceiling:
+            return unit_price <= ceiling
+        if self.highest_price:  # 신규 상장 등 직전 시세가 없는 종목은 시장 최고가만 넘지 않으면 인정한다
+            return unit_price <= self.highest_price
+        return True
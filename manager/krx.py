@@ -1,64 +1,186 @@
-import requests
+import os
+import time
+import gzip
 import json
+import threading
+from collections import OrderedDict
 import numpy as np
-from pandas import DataFrame
 
 from manager.log_manager import LogManager
+from manager.http_manager import HttpManager, HttpError
 from utils.commons import get_current_time
+from utils.config import DATA_DIR, KRX_SNAPSHOT_TTL, KRX_FINAL_TIME
 
 BASE_URL = 'http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd'
+MEMORY_SNAPSHOTS = 4  # 메모리에 들고 있는 날짜 수. 과거 시세를 몰아서 받을 때 메모리가 늘지 않게 한다
+SNAPSHOT_DIR = DATA_DIR + 'krx/'
+MARKET_NAMES = {  # KRX MKT_NM -> 우리 market. 코스닥 글로벌 종목은 KSQ로 조회해도 같이 나온다
+    'KOSPI': ['KOSPI'],
+    'KOSDAQ': ['KOSDAQ', 'KOSDAQ GLOBAL'],
+}
+TICKER_COLUMNS = ['stock_code', 'business_date', 'open', 'high', 'low', 'close', 'volume', 'quote_volume',
+                  'market_capitalization', 'market', 'market_rank', 'market_ratio', 'operating_share', 'created_at']
+NUMERIC_COLUMNS = [  # (ticker 컬럼, KRX 필드)
+    ('open', 'TDD_OPNPRC'),
+    ('high', 'TDD_HGPRC'),
+    ('low', 'TDD_LWPRC'),
+    ('close', 'TDD_CLSPRC'),
+    ('volume', 'ACC_TRDVOL'),
+    ('quote_volume', 'ACC_TRDVAL'),
+    ('market_capitalization', 'MKTCAP'),
+    ('operating_share', 'LIST_SHRS'),
+]
+
+
+def to_int64(values):
+    """
+    '1,234' 형식 문자열 배열을 한 번에 int64로 바꾼다. '-'와 빈 값은 0
+    """
+    column = np.char.replace(np.asarray(values, dtype=str), ',', '')
+    column[(column == '-') | (column == '')] = '0'
+    return column.astype(np.int64)
+
+
+def decode_tickers(rows, market, target_date):
+    """
+    KRX OutBlock_1 row 목록에서 숫자 컬럼만 벡터로 변환하고, 시가총액 내림차순 argsort로 market_rank를 매겨 tuple로 돌려준다.
+    """
+    numeric = {c: to_int64([r[field] for r in rows]) for c, field in NUMERIC_COLUMNS}
+    order = np.argsort(-numeric['market_capitalization'], kind='stable')
+    numeric = {c: v[order].tolist() for c, v in numeric.items()}
+    stock_codes = [rows[i]['ISU_SRT_CD'] for i in order.tolist()]
+
+    created_at = get_current_time()
+    return [(stock_code, target_date, o, h, l, c, vol, qv, cap, market, rank + 1, None, share, created_at)
+            for rank, (stock_code, o, h, l, c, vol, qv, cap, share) in enumerate(zip(
+                stock_codes, numeric['open'], numeric['high'], numeric['low'], numeric['close'], numeric['volume'],
+                numeric['quote_volume'], numeric['market_capitalization'], numeric['operating_share']))]
 
 
 class Krx:
+    """
+    KRX 전종목 시세(MDCSTAT01501)는 날짜마다 ALL 한 번만 받아서 data/krx/{date}.json.gz로 남기고,
+    시장별 목록과 순위는 이 snapshot을 나눠서 계산한다.
+    장 마감 후(KRX_FINAL_TIME)나 지난 날짜의 snapshot은 확정본으로 보고 다시 받지 않는다.
+    """
     def __init__(self):
         self.logger = LogManager().logger
+        self.http_manager = HttpManager()
+        self.lock = threading.Lock()
+        self.snapshots = OrderedDict()  # target_date -> (fetched_at, final, rows)
+        self.date_locks = {}
 
-    def get_empty_ticker(self, k, v, _market, _target_date, _market_rank):
-        ticker = {
-            'stock_code': k,
-            'business_date': _target_date,
-            'open': v.get('open'),
-            'high': v.get('high'),
-            'low': v.get('low'),
-            'close': v.get('close'),
-            'volume': v.get('volume'),
-            'quote_volume': v.get('quote_volume'),
-            'market_capitalization': v.get('market_capitalization'),
-            'market': _market,
-            'market_rank': _market_rank,
-            'market_ratio': v.get('market_ratio'),
-            'operating_share': v.get('operating_share'),
-            'created_at': get_current_time(),
-        }
-        return ticker
+    def __is_final(self, target_date):
+        return target_date < get_current_time('%Y%m%d') or get_current_time('%H%M') >= KRX_FINAL_TIME
 
-    def get_ticker_info(self, _target_date, _market='ALL'):
-        krx_market = {'KOSPI': 'STK', 'KOSDAQ': 'KSQ', 'ALL': 'ALL'}
+    def __read_snapshot(self, target_date):
+        try:
+            with gzip.open(f'{SNAPSHOT_DIR}{target_date}.json.gz', 'rt', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not snapshot.get('rows'):  # 예전에 남은 빈 snapshot은 없는 것으로 보고 다시 받는다
+            return None
+        return snapshot.get('fetched_at'), snapshot.get('final'), snapshot.get('rows')
+
+    def __write_snapshot(self, target_date, fetched_at, final, rows):
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        file = f'{SNAPSHOT_DIR}{target_date}.json.gz'
+        tmp_file = f'{file}.{os.getpid()}.tmp'
+        with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+            json.dump({'fetched_at': fetched_at, 'final': final, 'rows': rows}, f, ensure_ascii=False)
+        os.replace(tmp_file, file)  # checker/closer가 같은 파일을 읽고 있어도 온전한 파일만 보인다
+
+    def __fetch_snapshot(self, target_date):
         p = {
             'bld': 'dbms/MDC/STAT/standard/MDCSTAT01501',
-            'mktId': krx_market.get(_market),
-            'trdDd': _target_date
+            'mktId': 'ALL',
+            'trdDd': target_date
         }
-        resp = requests.post(BASE_URL, headers={"User-Agent": "Mozilla/5.0"}, data=p)
+        try:
+            resp = self.http_manager.post(BASE_URL, 'krx', cache_ttl=0, headers={"User-Agent": "Mozilla/5.0"}, data=p)
+        except HttpError as e:
+            self.logger.critical(f'[ERROR] get_snapshot {target_date}\n{e}')
+            return None
         if resp.status_code != 200:
-            self.logger.critical(f'[ERROR] status code != 200 in get_ticker_info {_market}')
-            return
+            self.logger.critical(f'[ERROR] status code != 200 in get_snapshot {target_date}')
+            return None
+        try:
+            rows = json.loads(resp.text).get('OutBlock_1')
+        except (ValueError, AttributeError) as e:  # 요청 제한/점검 페이지는 JSON이 아니다
+            self.logger.critical(f'[ERROR] invalid response in get_snapshot {target_date}\n{e}')
+            return None
+        if not rows:  # 휴장일도 종목별로 '-'가 채워져 오므로 빈 목록은 실패로 보고 남기지 않는다
+            self.logger.critical(f'[ERROR] empty OutBlock_1 in get_snapshot {target_date}')
+            return None
+        return rows
 
-        df = DataFrame(json.loads(resp.text).get('OutBlock_1'))
-        df = df[['MKT_NM', 'ISU_ABBRV', 'ISU_SRT_CD', 'TDD_OPNPRC', 'TDD_HGPRC', 'TDD_LWPRC', 'TDD_CLSPRC', 'ACC_TRDVOL', 'ACC_TRDVAL', 'MKTCAP', 'LIST_SHRS']]
-        df.columns = ['market', 'corp_name', 'stock_code', 'open', 'high', 'low', 'close', 'volume', 'quote_volume', 'market_capitalization', 'operating_share']
-        if df.iloc[0]['open'] == '-':  # 휴일에는 - 반환하므로 return
+    def __remember(self, target_date, snapshot):
+        with self.lock:
+            self.snapshots[target_date] = snapshot
+            self.snapshots.move_to_end(target_date)
+            while len(self.snapshots) > MEMORY_SNAPSHOTS:
+                self.snapshots.popitem(last=False)
+
+    def __get_date_lock(self, target_date):
+        with self.lock:
+            return self.date_locks.setdefault(target_date, threading.Lock())
+
+    def get_snapshot(self, target_date):
+        """
+        target_date의 전종목 원본 row(OutBlock_1) 목록. 메모리 -> 디스크 -> KRX 순서로 찾는다.
+        같은 날짜는 한 스레드만 받고, 다른 날짜끼리는 동시에 받는다.
+        """
+        with self.__get_date_lock(target_date):
+            with self.lock:
+                snapshot = self.snapshots.get(target_date)
+            snapshot = snapshot or self.__read_snapshot(target_date)
+            if snapshot:
+                fetched_at, final, rows = snapshot
+                if final or time.time() - fetched_at < KRX_SNAPSHOT_TTL:
+                    self.__remember(target_date, snapshot)
+                    return rows
+
+            final = self.__is_final(target_date)  # 받기 전에 정해야 마감 직전 시세를 확정본으로 남기지 않는다
+            rows = self.__fetch_snapshot(target_date)
+            if rows is None:
+                return None
+
+            snapshot = (time.time(), final, rows)
+            self.__remember(target_date, snapshot)
+            try:
+                self.__write_snapshot(target_date, *snapshot)
+            except OSError as e:
+                self.logger.critical(f'[ERROR] write krx snapshot {target_date}\n{e}')
+            return rows
+
+    def is_market_opened(self, _target_date):
+        rows = self.get_snapshot(_target_date)
+        return bool(rows) and rows[0].get('TDD_OPNPRC') != '-'  # 휴일에는 - 반환
+
+    def get_ticker_rows(self, _target_date, _market='ALL'):
+        """
+        TICKER_COLUMNS 순서의 tuple 목록 (시장 안 시가총액 순). 휴일이거나 조회 실패면 None
+        """
+        rows = self.get_snapshot(_target_date)
+        if not rows or rows[0].get('TDD_OPNPRC') == '-':  # 휴일에는 - 반환하므로 return
+            return
+        if _market != 'ALL':
+            rows = [r for r in rows if r.get('MKT_NM') in MARKET_NAMES.get(_market, [_market])]
+        if not rows:
             return
-        df = df.replace('[^-\w\.]', '', regex=True)
-        df = df.replace('\-$', '0', regex=True)
-        df = df.replace('', '0')
-        df = df.set_index('stock_code')
-        df = df.astype({
-            'open': np.int64, 'high': np.int64, 'low': np.int64, 'close': np.int64, 'volume': np.int64,
-            'quote_volume': np.int64, 'market_capitalization': np.int64, 'operating_share': np.int64})
-        tickers = df.sort_values(by='market_capitalization', ascending=False).to_dict('index').items()
-
-        ticker_info = []
-        for i, (k, v) in enumerate(tickers):
-            ticker_info.append(self.get_empty_ticker(k, v, _market, _target_date, i + 1))
-        return ticker_info
+        return decode_tickers(rows, _market, _target_date)
+
+    def get_ticker_info(self, _target_date, _market='ALL'):
+        rows = self.get_ticker_rows(_target_date, _market)
+        if rows:
+            return [dict(zip(TICKER_COLUMNS, r)) for r in rows]
+
+    def get_market_tickers(self, _target_date, _markets=('KOSPI', 'KOSDAQ')):
+        """
+        한 번 받은 snapshot에서 시장별로 나눠 시장 안 시가총액 순위를 매긴 ticker tuple 목록
+        """
+        tickers = []
+        for market in _markets:
+            tickers += self.get_ticker_rows(_target_date, market) or []
+        return tickers
@@ -1,27 +1,49 @@
-import requests
+import os
 import re
+import json
+from concurrent.futures import ThreadPoolExecutor
 
 from manager.log_manager import LogManager
 from manager.db_manager import DbManager
+from manager.http_manager import HttpManager, HttpError
 from utils.commons import get_current_time
+from utils.config import DATA_DIR, NAVER_WORKERS
 
 BASE_URL = 'https://m.stock.naver.com/sise'
+INDUSTRY_EXP = re.compile(r'<a href="/sise/sise_group_detail.naver\?type=upjong&no=([0-9]+)">(.+)</a>')
+CORPORATE_EXP = re.compile(r'<a href="/item/main.nhn\?code=([0-9]+)">(.+)</a>')
+MEMBERSHIP_FILE = DATA_DIR + 'industry_membership.json'
+
+
+def diff_membership(old, new):
+    """
+    {stock_code: industry_code} 두 개를 비교해서 {'added': [...], 'removed': [...], 'moved': [(stock_code, before, after)]}
+    """
+    return {
+        'added': sorted(s for s in new.keys() - old.keys()),
+        'removed': sorted(s for s in old.keys() - new.keys()),
+        'moved': sorted((s, old[s], new[s]) for s in new.keys() & old.keys() if old[s] != new[s]),
+    }
 
 
 class Naver:
     def __init__(self):
         self.logger = LogManager().logger
         self.db_manager = DbManager()
+        self.http_manager = HttpManager()
 
     def __get_industry_list(self):
         url = 'https://finance.naver.com/sise/sise_group.nhn?type=upjong'
-        resp = requests.get(url)
+        try:
+            resp = self.http_manager.get(url, 'naver', validate=lambda r: INDUSTRY_EXP.search(r.text) is not None)
+        except HttpError as e:
+            self.logger.critical(f'[ERROR] get_industry_list\n{e}')
+            return
         if resp.status_code != 200:
             self.logger.critical('[ERROR] status code != 200 in get_industry_list')
             return
         
-        exp = r'<a href="/sise/sise_group_detail.naver\?type=upjong&no=([0-9]+)">(.+)</a>'
-        data = re.findall(exp, resp.text)
+        data = INDUSTRY_EXP.findall(resp.text)
 
         industry_list = []
         for i, d in enumerate(data):
@@ -36,28 +58,91 @@ class Naver:
     
     def __get_industry_corporates_list(self, industry_code):
         url = f'https://finance.naver.com/sise/sise_group_detail.nhn?type=upjong&no={industry_code}'
-        resp = requests.get(url)
+        try:
+            resp = self.http_manager.get(url, 'naver', validate=lambda r: CORPORATE_EXP.search(r.text) is not None)  # 빈 페이지는 캐시하지 않는다
+        except HttpError as e:
+            self.logger.critical(f'[ERROR] get_industry_corporates_list\n{e}')
+            return
         if resp.status_code != 200:
             self.logger.critical('[ERROR] status code != 200 in get_industry_corporates_list')
             return
         
-        exp = r'<a href="/item/main.nhn\?code=([0-9]+)">(.+)</a>'
-        corporates_list = re.findall(exp, resp.text)
+        corporates_list = CORPORATE_EXP.findall(resp.text)
         return corporates_list
 
     def update_industry(self):
-        self.db_manager.delete_table('industry')
-        if not self.db_manager.insert_bulk_row('industry', self.__get_industry_list()):
+        """
+        바뀐 업종이 있으면 True. 목록을 못 받았으면 지금 industry를 그대로 둔다.
+        """
+        industry_list = self.__get_industry_list()
+        if not industry_list:
+            self.logger.critical('[ERROR] in update_industry: empty industry list')
+            return False
+
+        result = self.db_manager.sync_industry(industry_list)
+        if result is None:
             self.logger.critical('[ERROR] in update_industry')
-            return
+            return False
+        self.logger.info(f"[naver] industry +{result[0]} ~{result[1]} -{result[2]}")
+        return any(result)
+
+    def __read_membership(self):
+        try:
+            with open(MEMBERSHIP_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __write_membership(self, membership):
+        os.makedirs(os.path.dirname(MEMBERSHIP_FILE), exist_ok=True)
+        tmp_file = f'{MEMBERSHIP_FILE}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(membership, f)
+        os.replace(tmp_file, MEMBERSHIP_FILE)
+
+    def get_industry_membership(self):
+        """
+        업종별 종목 페이지를 NAVER_WORKERS개씩 동시에 받아 {industry_code: [stock_code, ...]}를 만든다.
+        naver session은 HttpManager가 keep-alive로 재사용하고, 요청 간격은 naver rate limit이 지킨다.
+        못 받았거나, 지난번에 종목이 있었는데 한 종목도 찾지 못한 업종은 지난번 membership을 그대로 쓴다.
+        """
+        last_membership = self.__read_membership()
+        industry_codes = [ind.get('industry_code') for ind in self.db_manager.get_industry_list() or []]
+        if not industry_codes:
+            return last_membership, last_membership
+
+        with ThreadPoolExecutor(max_workers=NAVER_WORKERS) as executor:
+            pages = list(executor.map(self.__get_industry_corporates_list, industry_codes))
+
+        membership, failed = {}, []
+        for industry_code, data in zip(industry_codes, pages):
+            if data is None or (not data and last_membership.get(industry_code)):  # 종목이 있던 업종이 비어 오면 차단/캡차 페이지로 본다
+                failed.append(industry_code)
+                membership[industry_code] = last_membership.get(industry_code, [])
+            else:
+                membership[industry_code] = sorted(set(d[0] for d in data))
+        if failed:
+            self.logger.info(f"[naver] failed industries (using last membership): {', '.join(failed)}")
+        return last_membership, membership
 
     def fill_industry_corporate(self, _corporates):
-        industry_list = self.db_manager.get_industry_list()
-        industry_map = {}
-        for ind in industry_list:
-            data = self.__get_industry_corporates_list(ind.get('industry_code'))
-            tmp = {d[0]: ind.get('industry_code') for d in data}
-            industry_map.update(tmp)
+        last_membership, membership = self.get_industry_membership()
+
+        def to_industry_map(m):  # 여러 업종에 있는 종목은 order_id가 뒤인 업종으로
+            return {stock_code: industry_code for industry_code, stock_codes in m.items() for stock_code in stock_codes}
+        industry_map = to_industry_map(membership)
+
+        if membership == last_membership:
+            self.logger.info('[naver] industry membership unchanged')
+        else:
+            diff = diff_membership(to_industry_map(last_membership), industry_map)
+            self.logger.info(f"[naver] industry membership changed: +{len(diff['added'])} -{len(diff['removed'])} ~{len(diff['moved'])}")
+            for stock_code, before, after in diff['moved']:
+                self.logger.info(f"[naver] {stock_code}: {before} -> {after}")
+            try:
+                self.__write_membership(membership)
+            except OSError as e:
+                self.logger.critical(f'[ERROR] write industry membership\n{e}')
 
         for c in _corporates:
             c['industry_code'] = industry_map.get(c['stock_code'])
@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime, date
+
+import numpy as np
+
+from manager.log_manager import LogManager
+from manager.db_manager import DbManager
+from utils.config import DATA_DIR
+
+PRICE_STORE_DIR = DATA_DIR + 'prices/'
+PRICE_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'market_capitalization']
+DATE_HEADROOM = 256  # 파일을 다시 만들지 않고 붙일 수 있는 날짜/종목 여유분
+STOCK_HEADROOM = 256
+KEEP_GENERATIONS = 2  # 바꿔 끼운 직후 이전 세대를 열고 있는 reader가 있을 수 있어서 하나 더 남긴다
+
+
+class PriceStoreNotBuilt(Exception):
+    pass
+
+
+class PriceStore:
+    """
+    ticker 시세를 필드별 (날짜 x 종목) int64 행렬 .npy로 들고 memmap으로 읽는다. 거래가 없는 칸은 0
+    한 세대(generation) 디렉토리에 행렬과 meta.json(날짜/종목 순서, 행렬 크기)이 있고, CURRENT 파일이 지금 세대를 가리킨다.
+    하루치는 지금 세대의 여유 칸에 써 넣은 뒤 meta만 바꾸고, rebuild나 여유분이 모자랄 때는 새 세대를 다 만든 뒤 CURRENT를 바꾼다.
+    쓰는 쪽(DataFactory, ticker.py)은 .lock 파일로 한 프로세스씩만 쓴다.
+    """
+    def __init__(self, path=PRICE_STORE_DIR):
+        self.logger = LogManager().logger
+        self.path = path
+        self.lock = threading.Lock()
+        self.signature = None
+        self.dates = []
+        self.stocks = []
+        self.date_index = {}
+        self.stock_index = {}
+        self.arrays = {}
+
+    def __to_key(self, value):
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y%m%d')
+        return value
+
+    def __current_file(self):
+        return self.path + 'CURRENT'
+
+    def __read_current(self):
+        try:
+            with open(self.__current_file(), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def __meta_file(self, generation):
+        return f'{self.path}{generation}/meta.json'
+
+    def __array_file(self, generation, field):
+        return f'{self.path}{generation}/{field}.npy'
+
+    def exists(self):
+        return self.__read_current() is not None
+
+    def __read_meta(self, generation):
+        with open(self.__meta_file(generation), 'r') as f:
+            return json.load(f)
+
+    def __write_meta(self, generation, dates, stocks, date_capacity, stock_capacity):
+        tmp_file = self.__meta_file(generation) + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'dates': dates, 'stocks': stocks, 'date_capacity': date_capacity, 'stock_capacity': stock_capacity}, f)
+        os.replace(tmp_file, self.__meta_file(generation))  # 읽는 쪽은 meta가 바뀐 뒤에야 새 날짜를 본다
+
+    def refresh(self):
+        """
+        CURRENT나 meta.json이 바뀌었으면 다시 연다. 행렬은 mmap_mode='r'이라 필요한 칸만 메모리에 올라온다.
+        """
+        generation = self.__read_current()
+        if generation is None:
+            return False
+        try:
+            signature = (generation, os.stat(self.__meta_file(generation)).st_mtime_ns)
+            if signature == self.signature:
+                return True
+
+            with self.lock:
+                meta = self.__read_meta(generation)
+                arrays = {f: np.load(self.__array_file(generation, f), mmap_mode='r') for f in PRICE_FIELDS}
+        except FileNotFoundError:  # 읽는 사이에 세대가 바뀌었으면 지금 들고 있는 것을 쓰고 다음에 다시 연다
+            return self.signature is not None
+
+        with self.lock:
+            self.arrays = arrays
+            self.dates, self.stocks = meta['dates'], meta['stocks']
+            self.date_index = {d: i for i, d in enumerate(self.dates)}
+            self.stock_index = {s: j for j, s in enumerate(self.stocks)}
+            self.signature = signature
+        return True
+
+    def get_row(self, stock_code, target_date):
+        """
+        get_ticker_info 대신 쓰는 한 종목 하루치 {field: value}. 종목이나 날짜가 없으면 None
+        """
+        if not self.refresh():
+            raise PriceStoreNotBuilt(self.path)
+        i, j = self.date_index.get(self.__to_key(target_date)), self.stock_index.get(stock_code)
+        if i is None or j is None:
+            return None
+        return {f: int(self.arrays[f][i, j]) for f in PRICE_FIELDS}
+
+    def get_window(self, stock_code, start_date, end_date, field='close'):
+        """
+        start_date ~ end_date (양 끝 포함) 사이 (날짜 목록, 값 배열). 배열은 memmap의 view라 복사하지 않는다.
+        store가 없으면 PriceStoreNotBuilt (빈 결과로 조용히 넘어가지 않게 한다)
+        """
+        if not self.refresh():
+            raise PriceStoreNotBuilt(self.path)
+        if stock_code not in self.stock_index:
+            return [], np.empty(0, dtype=np.int64)
+        i0 = bisect_left(self.dates, self.__to_key(start_date))
+        i1 = max(i0, bisect_right(self.dates, self.__to_key(end_date)))
+        return self.dates[i0:i1], self.arrays[field][i0:i1, self.stock_index[stock_code]]
+
+    @contextmanager
+    def __write_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.path + '.lock', 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def __create_generation(self, dates, stocks, old=None):
+        """
+        여유분을 둔 새 세대 디렉토리에 행렬 파일을 만들고, old(generation, meta)가 있으면 기존 값을 옮겨 담는다.
+        """
+        generation = f'g{time.time_ns()}'
+        os.makedirs(self.path + generation)
+        date_capacity, stock_capacity = len(dates) + DATE_HEADROOM, len(stocks) + STOCK_HEADROOM
+        for f in PRICE_FIELDS:
+            array = np.lib.format.open_memmap(self.__array_file(generation, f), mode='w+', dtype=np.int64,
+                                              shape=(date_capacity, stock_capacity))
+            if old:
+                old_generation, old_meta = old
+                n_dates, n_stocks = len(old_meta['dates']), len(old_meta['stocks'])
+                array[:n_dates, :n_stocks] = np.load(self.__array_file(old_generation, f), mmap_mode='r')[:n_dates, :n_stocks]
+            array.flush()
+            del array
+        return generation, date_capacity, stock_capacity
+
+    def __switch(self, generation):
+        """
+        CURRENT를 새 세대로 바꾸고 오래된 세대를 지운다. (열려 있는 memmap은 지워져도 계속 읽힌다)
+        """
+        tmp_file = self.__current_file() + '.tmp'
+        with open(tmp_file, 'w') as f:
+            f.write(generation)
+        os.replace(tmp_file, self.__current_file())
+
+        generations = sorted(d for d in os.listdir(self.path) if d.startswith('g') and os.path.isdir(self.path + d))
+        for old in generations[:-KEEP_GENERATIONS]:
+            shutil.rmtree(self.path + old, ignore_errors=True)
+
+    def __discard(self, generation):
+        shutil.rmtree(self.path + generation, ignore_errors=True)
+
+    def rebuild(self, db_manager=None):
+        with self.__write_lock():
+            return self.__rebuild(db_manager or DbManager())
+
+    def __rebuild(self, db_manager):
+        """
+        ticker 테이블 전체를 한 번 훑어서 새 세대로 만든다. 다 채운 뒤에만 CURRENT를 바꾸므로
+        읽는 쪽은 중간 상태를 보지 않고, 읽다가 실패하면 지금 세대가 그대로 남는다.
+        """
+        dates = [self.__to_key(r.get('business_date')) for r in db_manager.get_business_dates() or []]
+        stocks = sorted(r.get('stock_code') for r in db_manager.get_ticker_stock_codes() or [])
+        if not dates or not stocks:
+            return False
+
+        generation, date_capacity, stock_capacity = self.__create_generation(dates, stocks)
+        try:
+            arrays = {f: np.load(self.__array_file(generation, f), mmap_mode='r+') for f in PRICE_FIELDS}
+            date_index = {d: i for i, d in enumerate(dates)}
+            stock_index = {s: j for j, s in enumerate(stocks)}
+
+            for batch in db_manager.stream_table('ticker', ['business_date', 'stock_code'] + PRICE_FIELDS):
+                i = np.array([date_index[self.__to_key(r[0])] for r in batch])
+                j = np.array([stock_index[r[1]] for r in batch])
+                for k, f in enumerate(PRICE_FIELDS):
+                    arrays[f][i, j] = [r[k + 2] for r in batch]
+            for array in arrays.values():
+                array.flush()
+            del arrays
+
+            self.__write_meta(generation, dates, stocks, date_capacity, stock_capacity)
+        except BaseException:
+            self.__discard(generation)
+            raise
+
+        self.__switch(generation)
+        self.logger.info(f'price store rebuilt: {len(dates)} dates x {len(stocks)} stocks')
+        return True
+
+    def append(self, target_date, tickers, columns):
+        """
+        하루치 ticker(columns 순서의 tuple)를 붙인다. 이미 있는 날짜면 그 행을 덮어쓴다.
+        store가 없거나 마지막 날짜보다 이전 날짜가 들어오면 순서를 지킬 수 없으므로 rebuild 한다.
+        """
+        with self.__write_lock():
+            generation = self.__read_current()
+            if generation is None:
+                return self.__rebuild(DbManager())
+
+            target_date = self.__to_key(target_date)
+            meta = self.__read_meta(generation)
+            dates, stocks = meta['dates'], meta['stocks']
+            if target_date not in dates and dates and target_date < dates[-1]:
+                return self.__rebuild(DbManager())
+
+            position = {c: k for k, c in enumerate(columns)}
+            new_dates = dates if target_date in dates else dates + [target_date]
+            new_stocks = stocks + sorted(set(t[position['stock_code']] for t in tickers) - set(stocks))
+
+            date_capacity, stock_capacity = meta['date_capacity'], meta['stock_capacity']
+            switched = len(new_dates) > date_capacity or len(new_stocks) > stock_capacity or target_date in dates
+            if switched:  # 이미 보이는 행을 덮어쓰거나 여유분이 모자라면 새 세대에 써서 바꿔 끼운다
+                old = (generation, meta)
+                generation, date_capacity, stock_capacity = self.__create_generation(new_dates, new_stocks, old)
+
+            try:
+                arrays = {f: np.load(self.__array_file(generation, f), mmap_mode='r+') for f in PRICE_FIELDS}
+                i = new_dates.index(target_date)
+                stock_index = {s: j for j, s in enumerate(new_stocks)}
+                j = np.array([stock_index[t[position['stock_code']]] for t in tickers])
+                for f in PRICE_FIELDS:
+                    arrays[f][i, :] = 0
+                    arrays[f][i, j] = [t[position[f]] for t in tickers]
+                    arrays[f].flush()
+                del arrays
+
+                self.__write_meta(generation, new_dates, new_stocks, date_capacity, stock_capacity)
+            except BaseException:
+                if switched:
+                    self.__discard(generation)
+                raise
+
+            if switched:
+                self.__switch(generation)
+            return True
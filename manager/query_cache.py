@@ -0,0 +1,149 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from utils.config import DATA_DIR, CACHE_TTL, CACHE_MAX_SIZE
+
+GENERATION_FILE = DATA_DIR + 'cache_generation'
+GENERATION_CHECK_SECONDS = 1
+
+
+class QueryCache:
+    """
+    DbManager 조회 결과를 담아두는 TTL + LRU 캐시.
+    다른 프로세스(DataFactory)에서 invalidate 하면 GENERATION_FILE의 mtime이 바뀌므로 이를 보고 비운다.
+    """
+    caches = {}
+    lock = threading.Lock()
+    generation = None
+    generation_checked_at = 0.0
+
+    def __init__(self, name, tables, ttl, maxsize):
+        self.name = name
+        self.tables = set(tables)
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            }
+
+    @classmethod
+    def register(cls, name, tables, ttl, maxsize):
+        with cls.lock:
+            if name not in cls.caches:
+                cls.caches[name] = cls(name, tables, ttl, maxsize)
+            return cls.caches[name]
+
+    @classmethod
+    def __read_generation(cls):
+        try:
+            return os.stat(GENERATION_FILE).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def sync_generation(cls):
+        now = time.monotonic()
+        if now - cls.generation_checked_at < GENERATION_CHECK_SECONDS:
+            return
+        cls.generation_checked_at = now
+
+        generation = cls.__read_generation()
+        if generation != cls.generation:
+            cls.generation = generation
+            cls.invalidate_tables()
+
+    @classmethod
+    def invalidate_tables(cls, tables=None):
+        for cache in list(cls.caches.values()):
+            if tables is None or cache.tables & set(tables):
+                cache.clear()
+
+    @classmethod
+    def broadcast(cls):
+        if not os.path.exists(DATA_DIR):
+            os.makedirs(DATA_DIR, exist_ok=True)
+        with open(GENERATION_FILE, 'a'):
+            os.utime(GENERATION_FILE, None)
+        cls.generation = cls.__read_generation()
+
+    @classmethod
+    def get_all_stats(cls):
+        return {name: cache.get_stats() for name, cache in cls.caches.items()}
+
+
+def copy_result(value):
+    """
+    조회 결과(row dict 목록, row dict, 스칼라)를 호출한 쪽이 고쳐도 캐시가 바뀌지 않도록 복사한다.
+    row 안의 값(str, int, datetime, Decimal)은 불변이므로 row까지만 복사한다.
+    """
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def cached(tables, ttl=CACHE_TTL, maxsize=CACHE_MAX_SIZE, key=None):
+    """
+    DbManager 조회 메서드용 read-through 캐시. 실패(None)나 빈 결과는 담지 않는다.
+    checker/closer/commander가 결과를 고쳐 쓰므로 담을 때와 꺼낼 때 모두 복사본을 준다.
+    key가 있으면 key(*args, **kwargs)를 캐시 key로 쓴다. (생략된 '오늘' 같은 기본값을 풀어서 넣을 때)
+    """
+    def decorator(func):
+        cache = QueryCache.register(func.__name__, tables, ttl, maxsize)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            QueryCache.sync_generation()
+            if key:
+                cache_key = key(*args, **kwargs)
+            else:
+                cache_key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            hit, value = cache.get(cache_key)
+            if hit:
+                return copy_result(value)
+
+            value = func(self, *args, **kwargs)
+            if value:
+                cache.set(cache_key, copy_result(value))
+            return value
+        return wrapper
+    return decorator
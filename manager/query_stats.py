@@ -0,0 +1,93 @@
+import time
+import threading
+from collections import defaultdict, deque
+
+from utils.config import QUERY_STATS_SAMPLES
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class QueryTimer:
+    __slots__ = ('method', 'query', 'started', 'acquired_at', 'finished_at', 'rows', 'failed')
+
+    def __init__(self, method, query):
+        self.method = method
+        self.query = query
+        self.started = time.perf_counter()
+        self.acquired_at = None
+        self.finished_at = None
+        self.rows = 0
+        self.failed = False
+
+    def acquired(self):
+        self.acquired_at = time.perf_counter()
+
+    def finished(self):
+        self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed_ms(self):
+        return (self.finished_at - self.started) * 1000
+
+    @property
+    def acquire_ms(self):
+        return ((self.acquired_at or self.finished_at) - self.started) * 1000
+
+
+class QueryStats:
+    """
+    DbManager 메서드별 wall time / 커넥션 대기 시간 / row 수를 최근 QUERY_STATS_SAMPLES개씩 들고 있는다.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.elapsed = defaultdict(lambda: deque(maxlen=QUERY_STATS_SAMPLES))
+        self.acquire = defaultdict(lambda: deque(maxlen=QUERY_STATS_SAMPLES))
+        self.calls = defaultdict(int)
+        self.rows = defaultdict(int)
+        self.failures = defaultdict(int)
+        self.slow = defaultdict(int)
+
+    def record(self, timer, is_slow):
+        with self.lock:
+            self.elapsed[timer.method].append(timer.elapsed_ms)
+            self.acquire[timer.method].append(timer.acquire_ms)
+            self.calls[timer.method] += 1
+            self.rows[timer.method] += timer.rows
+            self.failures[timer.method] += 1 if timer.failed else 0
+            self.slow[timer.method] += 1 if is_slow else 0
+
+    def get_summary(self):
+        with self.lock:
+            summary = []
+            for method, elapsed in self.elapsed.items():
+                elapsed, acquire = list(elapsed), list(self.acquire[method])
+                summary.append({
+                    'method': method,
+                    'calls': self.calls[method],
+                    'p50_ms': round(percentile(elapsed, 50), 2),
+                    'p95_ms': round(percentile(elapsed, 95), 2),
+                    'p99_ms': round(percentile(elapsed, 99), 2),
+                    'max_ms': round(max(elapsed), 2),
+                    'acquire_p95_ms': round(percentile(acquire, 95), 2),
+                    'avg_rows': round(self.rows[method] / self.calls[method], 1),
+                    'failures': self.failures[method],
+                    'slow': self.slow[method],
+                })
+        return sorted(summary, key=lambda s: s['p95_ms'], reverse=True)
+
+    def format_summary(self):
+        lines = [f"{'method':<26}{'calls':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'acq95':>8}{'rows':>8}{'slow':>6}{'fail':>6}"]
+        for s in self.get_summary():
+            lines.append(f"{s['method']:<26}{s['calls']:>7}{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}"
+                         f"{s['acquire_p95_ms']:>8}{s['avg_rows']:>8}{s['slow']:>6}{s['failures']:>6}")
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self.lock:
+            for d in (self.elapsed, self.acquire, self.calls, self.rows, self.failures, self.slow):
+                d.clear()
@@ -0,0 +1,148 @@
+import os
+import time
+import gzip
+import json
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+
+from utils.config import DATA_DIR, RESPONSE_CACHE_MODE, RESPONSE_CACHE_MAX_MB
+
+RESPONSE_CACHE_DIR = DATA_DIR + 'responses/'
+PRUNE_EVERY = 500  # 이만큼 저장할 때마다 전체 크기를 확인한다
+SECRET_PARAMS = {'crtfc_key'}  # 디스크에 평문으로 남기지 않는 query parameter
+
+
+class ResponseCache:
+    """
+    외부 응답 원문을 요청(method + url + params + data)의 sha256으로 data/responses/{source}/ 아래에 gzip으로 저장한다.
+    ttl이 None이면 만료 없이 쓰고, 0이면 저장하지 않는다. replay 모드에서는 ttl과 상관없이 저장된 응답만 쓴다.
+    전체 크기가 max_mb를 넘으면 오래된 파일부터 지운다.
+    """
+    def __init__(self, mode=RESPONSE_CACHE_MODE, path=RESPONSE_CACHE_DIR, max_mb=RESPONSE_CACHE_MAX_MB):
+        self.mode = mode  # off | on | replay
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.prune_lock = threading.Lock()
+        self.pruned = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @property
+    def enabled(self):
+        return self.mode in ('on', 'replay')
+
+    @property
+    def replay(self):
+        return self.mode == 'replay'
+
+    def __normalize(self, value):
+        if isinstance(value, dict):
+            return sorted([str(k), str(v)] for k, v in value.items())
+        if isinstance(value, bytes):
+            return value.decode('latin-1')
+        return value
+
+    def get_key(self, method, url, params=None, data=None):
+        payload = json.dumps([method.upper(), url, self.__normalize(params), self.__normalize(data)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def __get_file(self, source, key):
+        return f'{self.path}{source}/{key[:2]}/{key}.gz'
+
+    def __count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, source, key, ttl):
+        file = self.__get_file(source, key)
+        try:
+            if not self.replay and ttl is not None and time.time() - os.path.getmtime(file) > ttl:
+                self.__count('misses')
+                return None
+            with gzip.open(file, 'rb') as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            self.__count('misses')
+            return None
+
+        resp = requests.Response()
+        resp.status_code = header.get('status_code')
+        resp.url = header.get('url')
+        resp.encoding = header.get('encoding')
+        resp.headers.update(header.get('headers', {}))
+        resp._content = body
+        self.__count('hits')
+        return resp
+
+    def __strip_secrets(self, url):
+        if not url:
+            return url
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def set(self, source, key, resp, ttl):
+        if ttl == 0 or resp.status_code != 200:
+            return
+
+        file = self.__get_file(source, key)
+        header = {
+            'status_code': resp.status_code,
+            'url': self.__strip_secrets(resp.url),
+            'encoding': resp.encoding,
+            'headers': {k: v for k, v in resp.headers.items() if k.lower() == 'content-type'},
+        }
+        tmp_file = f'{file}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            with gzip.open(tmp_file, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                f.write(resp.content)
+            os.replace(tmp_file, file)  # 같은 요청을 여러 스레드가 저장해도 파일은 항상 온전하다
+        except OSError:  # 저장 실패는 캐시만 못 쓰는 것이므로 요청 결과에는 영향을 주지 않는다
+            return
+        self.__count('stores')
+        if self.stores % PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """
+        max_bytes를 넘으면 mtime이 오래된 응답부터 지워서 90%까지 줄인다. 이미 다른 스레드가 지우고 있으면 넘어간다.
+        """
+        if not self.prune_lock.acquire(blocking=False):
+            return
+        try:
+            files = []
+            for root, _, names in os.walk(self.path):
+                for name in names:
+                    file = os.path.join(root, name)
+                    try:
+                        st = os.stat(file)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, file))
+
+            total = sum(size for _, size, _ in files)
+            if total <= self.max_bytes:
+                return
+            for _, size, file in sorted(files):
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(file)
+                except OSError:
+                    continue
+                total -= size
+                self.pruned += 1
+        finally:
+            self.prune_lock.release()
+
+    def get_stats(self):
+        with self.lock:
+            return {'mode': self.mode, 'hits': self.hits, 'misses': self.misses, 'stores': self.stores, 'pruned': self.pruned}
@@ -0,0 +1,303 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from decimal import Decimal
+from functools import wraps
+
+from manager.query_cache import QueryCache
+from utils.commons import get_current_time
+from utils.config import DATA_DIR, SNAPSHOT_PATH, SNAPSHOT_TICKER_DAYS
+
+LOCAL_DB_PATH = DATA_DIR + 'local.sqlite'
+SWAP_CHECK_SECONDS = 1
+
+# MySQL 테이블과 같은 컬럼 이름을 쓰고, 날짜 컬럼은 TIMESTAMP로 선언해서 datetime으로 돌려받는다
+SNAPSHOT_SCHEMA = {
+    'industry': [('industry_code', 'TEXT'), ('industry_name', 'TEXT'), ('created_at', 'TIMESTAMP'), ('order_id', 'INTEGER')],
+    'corporate': [('stock_code', 'TEXT'), ('corp_code', 'TEXT'), ('corp_name', 'TEXT'), ('corp_shorten_name', 'TEXT'),
+                  ('industry_code', 'TEXT'), ('is_validated', 'INTEGER'), ('market', 'TEXT'), ('market_capitalization', 'TEXT'),
+                  ('market_rank', 'INTEGER'), ('updated_at', 'TIMESTAMP')],
+    'executive': [('rcept_no', 'TEXT'), ('disclosed_on', 'TIMESTAMP'), ('stock_code', 'TEXT'), ('executive_name', 'TEXT'),
+                  ('reason_code', 'TEXT'), ('traded_on', 'TIMESTAMP'), ('stock_type', 'TEXT'), ('before_volume', 'INTEGER'),
+                  ('delta_volume', 'INTEGER'), ('after_volume', 'INTEGER'), ('unit_price', 'REAL'), ('remark', 'TEXT'),
+                  ('created_at', 'TIMESTAMP')],
+    'frequency': [('business_date', 'TIMESTAMP'), ('period', 'TEXT'), ('stock_code', 'TEXT'), ('count', 'INTEGER'),
+                  ('created_at', 'TIMESTAMP')],
+    'ticker': [('stock_code', 'TEXT'), ('business_date', 'TIMESTAMP'), ('open', 'INTEGER'), ('high', 'INTEGER'), ('low', 'INTEGER'),
+               ('close', 'INTEGER'), ('volume', 'INTEGER'), ('quote_volume', 'INTEGER'), ('market_capitalization', 'INTEGER'),
+               ('market', 'TEXT'), ('market_rank', 'INTEGER'), ('market_ratio', 'REAL'), ('operating_share', 'INTEGER'),
+               ('created_at', 'TIMESTAMP')],
+    'business_date': [('business_date', 'TIMESTAMP')],
+}
+SNAPSHOT_INDEXES = [
+    'CREATE INDEX idx_executive_disclosed ON executive (disclosed_on, reason_code, stock_type, stock_code)',
+    'CREATE INDEX idx_executive_stock_rcept ON executive (stock_code, rcept_no)',
+    'CREATE INDEX idx_corporate_stock ON corporate (stock_code)',
+    'CREATE INDEX idx_corporate_name ON corporate (corp_name)',
+    'CREATE INDEX idx_frequency_period_date ON frequency (period, business_date)',
+    'CREATE INDEX idx_ticker_date_stock ON ticker (business_date, stock_code)',
+    'CREATE INDEX idx_business_date ON business_date (business_date)',
+]
+LOCAL_SCHEMA = {
+    'user': [('chat_id', 'TEXT PRIMARY KEY'), ('nickname', 'TEXT'), ('role', 'TEXT'), ('is_paid', 'INTEGER'), ('is_active', 'INTEGER'),
+             ('created_at', 'TIMESTAMP'), ('expired_at', 'TIMESTAMP'), ('canceled_at', 'TIMESTAMP')],
+    'feedback': [('chat_id', 'TEXT'), ('content', 'TEXT'), ('created_at', 'TIMESTAMP')],
+    'logs': [('log_type', 'TEXT'), ('chat_id', 'TEXT'), ('created_at', 'TIMESTAMP'), ('is_sent', 'INTEGER')],
+}
+
+
+def to_timestamp(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return datetime.strptime(str(value), '%Y%m%d').strftime('%Y-%m-%d %H:%M:%S')
+
+
+def convert_timestamp(value):
+    value = value.decode()
+    return datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S') if len(value) > 10 else datetime.strptime(value, '%Y-%m-%d')
+
+
+sqlite3.register_adapter(datetime, lambda d: d.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter('TIMESTAMP', convert_timestamp)
+
+
+def snapshot_read(tables):
+    """
+    스냅샷(또는 local 모드)이 tables를 들고 있으면 같은 이름의 SqliteBackend 메서드로 읽는다.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if self.snapshot.serves(tables):
+                return getattr(self.snapshot, func.__name__)(*args, **kwargs)
+            return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SnapshotExporter:
+    """
+    MySQL의 읽기 전용 테이블을 sqlite 파일로 내려받고 os.replace로 한 번에 바꿔 끼운다.
+    """
+    def __init__(self, db_manager, logger):
+        self.db_manager = db_manager
+        self.logger = logger
+
+    def __create_table(self, conn, table, schema):
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(f"{c} {t}" for c, t in schema)})')
+
+    def __copy(self, conn, table, where=''):
+        columns = [c for c, _ in SNAPSHOT_SCHEMA[table]]
+        query = f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({", ".join(["?"] * len(columns))})'
+        count = 0
+        for rows in self.db_manager.stream_table(table, columns, where):
+            conn.executemany(query, rows)
+            count += len(rows)
+        return count
+
+    def export(self, path=SNAPSHOT_PATH):
+        started = time.perf_counter()
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            for table, schema in SNAPSHOT_SCHEMA.items():
+                self.__create_table(conn, table, schema)
+
+            counts = {t: self.__copy(conn, t) for t in ['industry', 'corporate', 'executive', 'frequency']}
+            business_dates = self.db_manager.get_business_dates() or []
+            conn.executemany('INSERT INTO business_date (business_date) VALUES (?)', [(d['business_date'],) for d in business_dates])
+            if business_dates:
+                since = business_dates[max(0, len(business_dates) - SNAPSHOT_TICKER_DAYS)]['business_date']
+                counts['ticker'] = self.__copy(conn, 'ticker', f"business_date >= '{since}'")
+
+            for query in SNAPSHOT_INDEXES:
+                conn.execute(query)
+            conn.commit()
+        except Exception:
+            conn.close()
+            os.remove(tmp_path)
+            raise
+        conn.close()
+
+        os.replace(tmp_path, path)  # 같은 파일시스템 안에서는 원자적으로 교체된다
+        self.logger.info(f'[snapshot] exported {counts} in {time.perf_counter() - started:.1f}s -> {path}')
+        return counts
+
+
+class SqliteBackend:
+    """
+    mode = 'off'      : 항상 MySQL을 쓴다. (DataFactory 등 기본값)
+    mode = 'snapshot' : 스냅샷 테이블(executive, corporate, industry, frequency, ticker) 조회만 sqlite에서 한다.
+    mode = 'local'    : user/feedback/logs도 local.sqlite에 두어서 MySQL 없이 봇을 띄운다.
+    스냅샷 파일이 바뀌면(inode/mtime) 스레드별 커넥션을 새로 연다.
+    """
+    def __init__(self, mode='off', path=SNAPSHOT_PATH):
+        self.mode = mode
+        self.path = path
+        self.local = threading.local()
+        self.signature = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def serves(self, tables):
+        if self.mode == 'snapshot':
+            return all(t in SNAPSHOT_SCHEMA for t in tables) and self.__is_available()
+        if self.mode == 'local':
+            return all(t in SNAPSHOT_SCHEMA or t in LOCAL_SCHEMA for t in tables)
+        return False
+
+    def __get_signature(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def __is_available(self):
+        now = time.monotonic()
+        if now - self.checked_at >= SWAP_CHECK_SECONDS:
+            with self.lock:
+                self.checked_at = now
+                signature = self.__get_signature()
+                if signature != self.signature:
+                    self.signature = signature
+                    QueryCache.invalidate_tables()  # 새 스냅샷이 들어오면 캐시도 비운다
+        return self.signature is not None
+
+    def __connect(self, path):
+        conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def __snapshot(self):
+        self.__is_available()
+        if getattr(self.local, 'signature', None) != self.signature or getattr(self.local, 'conn', None) is None:
+            if getattr(self.local, 'conn', None) is not None:
+                self.local.conn.close()
+            if self.signature is None and self.mode == 'local':
+                self.__init_local(self.path, SNAPSHOT_SCHEMA)
+                self.__is_available()
+            self.local.conn = self.__connect(self.path)
+            self.local.signature = self.signature
+        return self.local.conn
+
+    def __local(self):
+        if getattr(self.local, 'local_conn', None) is None:
+            self.__init_local(LOCAL_DB_PATH, LOCAL_SCHEMA)
+            self.local.local_conn = self.__connect(LOCAL_DB_PATH)
+        return self.local.local_conn
+
+    def __init_local(self, path, schema):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            for table, columns in schema.items():
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(f"{c} {t}" for c, t in columns)})')
+        self.checked_at = 0.0
+
+    def __execute(self, query, params=(), conn=None):
+        cur = (conn or self.__snapshot()).execute(query, params)
+        return [dict(r) for r in cur.fetchall()]
+
+    def __write(self, table, rows):
+        conn = self.__local() if table in LOCAL_SCHEMA else self.__snapshot()
+        columns = list(rows[0].keys())
+        query = f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({", ".join(["?"] * len(columns))})'
+        with conn:
+            conn.executemany(query, [tuple(r[c] for c in columns) for r in rows])
+        return True
+
+    def get_disclosure_data(self, start_date, end_date):
+        query = "SELECT e.disclosed_on, e.rcept_no, e.stock_code, e.delta_volume, e.unit_price, c.corp_code, c.corp_name, c.market, c.market_capitalization, c.market_rank, i.industry_name " \
+                "FROM executive AS e LEFT JOIN corporate AS c ON e.stock_code = c.stock_code " \
+                "LEFT JOIN industry AS i ON c.industry_code = i.industry_code " \
+                "WHERE (e.disclosed_on BETWEEN ? AND ?) AND e.reason_code IN ('01', '02') AND e.stock_type IN ('01') " \
+                "AND (c.industry_code is not null and c.market_capitalization != '') "
+        return self.__execute(query, (to_timestamp(start_date), to_timestamp(end_date)))
+
+    def get_industry_list(self):
+        return self.__execute("SELECT * FROM industry ORDER BY order_id ASC")
+
+    def select_ticker_info(self, date):
+        return self.__execute("SELECT * FROM ticker WHERE business_date = ?", (to_timestamp(date),))
+
+    def get_corporate_info(self, corp_name):
+        query = "SELECT c.corp_name, c.market, c.market_rank, c.market_capitalization " \
+                "FROM corporate AS c WHERE c.corp_name = ? " \
+                "AND (c.industry_code is not null and c.market_capitalization != '')"
+        return self.__execute(query, (corp_name,))
+
+    def get_tg_detail_data(self, corp_name, target_date):
+        query = "SELECT e.* FROM executive AS e LEFT JOIN corporate AS c ON e.stock_code = c.stock_code " \
+                "WHERE c.corp_name = ? AND e.disclosed_on = ?"
+        return self.__execute(query, (corp_name, to_timestamp(target_date)))
+
+    def get_tg_company_data(self, corp_name, count):
+        query = "SELECT e.* FROM executive as e INNER JOIN " \
+                "(SELECT e.rcept_no FROM executive AS e " \
+                "LEFT JOIN corporate AS c ON e.stock_code = c.stock_code " \
+                "WHERE e.reason_code IN ('01', '02') AND e.stock_type IN ('01', '02') " \
+                "AND c.corp_name = ? AND (c.industry_code is not null and c.market_capitalization != '') " \
+                "GROUP BY e.rcept_no ORDER BY rcept_no DESC LIMIT ? " \
+                ") AS tmp ON e.rcept_no = tmp.rcept_no"
+        return self.__execute(query, (corp_name, int(count)))
+
+    def get_tg_executive_data(self, corp_name, executive_name, count):
+        query = "SELECT e.* FROM executive as e INNER JOIN " \
+                "(SELECT e.rcept_no FROM executive AS e " \
+                "LEFT JOIN corporate AS c ON e.stock_code = c.stock_code " \
+                "WHERE e.reason_code IN ('01', '02') AND e.stock_type IN ('01', '02') " \
+                "AND c.corp_name = ? " \
+                "AND (c.industry_code is not null and c.market_capitalization != '') " \
+                "AND e.executive_name = ? " \
+                "GROUP BY e.rcept_no ORDER BY rcept_no DESC LIMIT ? " \
+                ") AS tmp ON e.rcept_no = tmp.rcept_no"
+        return self.__execute(query, (corp_name, executive_name, int(count)))
+
+    def get_business_dates(self, after_date=None):
+        if after_date:
+            return self.__execute("SELECT business_date FROM business_date WHERE business_date > ? ORDER BY business_date ASC", (to_timestamp(after_date),))
+        return self.__execute("SELECT business_date FROM business_date ORDER BY business_date ASC")
+
+    def get_last_business_date(self, end_date=None, delta=1):
+        end_date = end_date or get_current_time('%Y%m%d')
+        query = "SELECT business_date FROM business_date WHERE business_date <= ? ORDER BY business_date DESC LIMIT ?"
+        return self.__execute(query, (to_timestamp(end_date), delta))[-1].get('business_date')
+
+    def get_highest_price(self, last_business_date):
+        query = "SELECT MAX((high * 1)) AS highest_price FROM ticker WHERE business_date = ?"
+        return self.__execute(query, (to_timestamp(last_business_date),))[0].get('highest_price')
+
+    def get_frequency_info(self, period, target_date):
+        return self.__execute("SELECT * FROM frequency WHERE period = ? AND business_date = ?", (period, to_timestamp(target_date)))
+
+    def get_ticker_info(self, stock_code, target_date):
+        return self.__execute("SELECT * FROM ticker WHERE stock_code = ? AND business_date = ?", (stock_code, to_timestamp(target_date)))[0]
+
+    def get_total_corporates(self):
+        return self.__execute("SELECT * FROM corporate")
+
+    def get_stock_code(self, corp_name):
+        return self.__execute("SELECT stock_code FROM corporate WHERE corp_name = ?", (corp_name,))
+
+    def is_valid_nickname(self, nickname):
+        return False if self.__execute('SELECT * FROM "user" WHERE nickname = ?', (nickname,), self.__local()) else True
+
+    def get_user_info(self, chat_id):
+        return self.__execute('SELECT * FROM "user" WHERE chat_id = ?', (str(chat_id),), self.__local())
+
+    def get_targets(self):
+        query = 'SELECT chat_id FROM "user" WHERE is_paid = 1 AND is_active = 1 AND expired_at > ?'
+        return self.__execute(query, (to_timestamp(get_current_time('%Y%m%d')),), self.__local())
+
+    def insert_row(self, table, params):
+        return self.__write(table, [params])
+
+    def insert_bulk_row(self, table, params):
+        return self.__write(table, params) if params else True
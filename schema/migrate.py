@@ -0,0 +1,72 @@
+import os
+import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
+
+import pymysql
+
+from utils.config import HOST, USER, PASSWORD, DB, PORT, CHARSET
+from utils.commons import get_current_time
+
+MIGRATION_DIR = os.path.dirname(os.path.realpath(__file__)) + '/migrations/'
+MIGRATION_FILE = re.compile(r'^V([0-9]+)__(.+)\.sql$')
+
+
+class Migrator:
+    """
+    schema/migrations/V{version}__{name}.sql 파일을 버전 순서대로 적용하고 schema_version 테이블에 기록한다.
+    """
+    def __init__(self):
+        self.conn = pymysql.connect(host=HOST, user=USER, password=PASSWORD, db=DB, port=PORT, charset=CHARSET, autocommit=True)
+
+    def get_migrations(self):
+        migrations = []
+        for file_name in os.listdir(MIGRATION_DIR):
+            m = MIGRATION_FILE.match(file_name)
+            if m:
+                migrations.append((int(m.group(1)), m.group(2), file_name))
+        return sorted(migrations)
+
+    def get_applied(self):
+        with self.conn.cursor() as cur:
+            cur.execute("CREATE TABLE IF NOT EXISTS `schema_version` ("
+                        "`version` INT NOT NULL, `name` VARCHAR(100) NOT NULL, `applied_at` DATETIME NOT NULL, "
+                        "PRIMARY KEY (`version`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4")
+            cur.execute("SELECT version FROM schema_version")
+            return set(r[0] for r in cur.fetchall())
+
+    def read_statements(self, file_name):
+        with open(MIGRATION_DIR + file_name, 'r') as f:
+            lines = [line for line in f.read().splitlines() if not line.strip().startswith('--')]
+        return [s.strip() for s in '\n'.join(lines).split(';') if s.strip()]
+
+    def status(self):
+        applied = self.get_applied()
+        for version, name, _ in self.get_migrations():
+            print(f"[{'x' if version in applied else ' '}] V{version:03d} {name}")
+
+    def up(self):
+        applied = self.get_applied()
+        for version, name, file_name in self.get_migrations():
+            if version in applied:
+                continue
+
+            print(f"[migrate] applying V{version:03d} {name}")
+            with self.conn.cursor() as cur:  # DDL은 암묵적으로 commit 되므로 실패 시 해당 파일을 고쳐서 다시 실행한다
+                for statement in self.read_statements(file_name):
+                    cur.execute(statement)
+                cur.execute("INSERT INTO schema_version (version, name, applied_at) VALUES (%s, %s, %s)",
+                            (version, name, get_current_time()))
+        print('[migrate] up to date')
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) >= 2 else 'status'
+    m = Migrator()
+    if command == 'up':
+        m.up()
+    elif command == 'status':
+        m.status()
+    else:
+        print('[WARNING] invalid command !! Only [status|up]')
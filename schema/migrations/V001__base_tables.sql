@@ -0,0 +1,111 @@
+-- 현재 운영 중인 테이블 정의 (dtnn)
+
+CREATE TABLE IF NOT EXISTS `industry` (
+    `industry_code` VARCHAR(10) NOT NULL,
+    `industry_name` VARCHAR(100) NOT NULL,
+    `created_at` DATETIME NOT NULL,
+    `order_id` INT NOT NULL,
+    PRIMARY KEY (`industry_code`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `corporate` (
+    `stock_code` VARCHAR(10) NOT NULL,
+    `corp_code` VARCHAR(10) NOT NULL,
+    `corp_name` VARCHAR(100) NOT NULL,
+    `corp_shorten_name` VARCHAR(100) NOT NULL DEFAULT '',
+    `industry_code` VARCHAR(10) NULL,
+    `is_validated` TINYINT(1) NOT NULL DEFAULT 0,
+    `market` VARCHAR(10) NOT NULL DEFAULT '',
+    `market_capitalization` VARCHAR(20) NOT NULL DEFAULT '',
+    `market_rank` INT NOT NULL DEFAULT 0,
+    `updated_at` DATETIME NOT NULL,
+    PRIMARY KEY (`stock_code`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `executive` (
+    `id` BIGINT NOT NULL AUTO_INCREMENT,
+    `rcept_no` VARCHAR(14) NOT NULL,
+    `disclosed_on` DATETIME NOT NULL,
+    `stock_code` VARCHAR(10) NOT NULL,
+    `executive_name` VARCHAR(100) NOT NULL,
+    `reason_code` VARCHAR(50) NOT NULL,
+    `traded_on` DATETIME NOT NULL,
+    `stock_type` VARCHAR(50) NOT NULL,
+    `before_volume` BIGINT NOT NULL,
+    `delta_volume` BIGINT NOT NULL,
+    `after_volume` BIGINT NOT NULL,
+    `unit_price` DOUBLE NOT NULL,
+    `remark` VARCHAR(255) NOT NULL DEFAULT '',
+    `created_at` DATETIME NOT NULL,
+    PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `ticker` (
+    `stock_code` VARCHAR(10) NOT NULL,
+    `business_date` DATETIME NOT NULL,
+    `open` BIGINT NOT NULL,
+    `high` BIGINT NOT NULL,
+    `low` BIGINT NOT NULL,
+    `close` BIGINT NOT NULL,
+    `volume` BIGINT NOT NULL,
+    `quote_volume` BIGINT NOT NULL,
+    `market_capitalization` BIGINT NOT NULL,
+    `market` VARCHAR(10) NOT NULL,
+    `market_rank` INT NOT NULL,
+    `market_ratio` DOUBLE NULL,
+    `operating_share` BIGINT NOT NULL,
+    `created_at` DATETIME NOT NULL,
+    PRIMARY KEY (`business_date`, `stock_code`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `frequency` (
+    `id` BIGINT NOT NULL AUTO_INCREMENT,
+    `business_date` DATETIME NOT NULL,
+    `period` CHAR(1) NOT NULL,
+    `stock_code` VARCHAR(10) NOT NULL,
+    `count` INT NOT NULL,
+    `created_at` DATETIME NOT NULL,
+    PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `user` (
+    `chat_id` VARCHAR(20) NOT NULL,
+    `nickname` VARCHAR(30) NOT NULL,
+    `role` CHAR(2) NOT NULL,
+    `is_paid` TINYINT(1) NOT NULL DEFAULT 0,
+    `is_active` TINYINT(1) NOT NULL DEFAULT 0,
+    `created_at` DATETIME NOT NULL,
+    `expired_at` DATETIME NOT NULL,
+    `canceled_at` DATETIME NULL,
+    PRIMARY KEY (`chat_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `feedback` (
+    `id` BIGINT NOT NULL AUTO_INCREMENT,
+    `chat_id` VARCHAR(20) NOT NULL,
+    `content` TEXT NOT NULL,
+    `created_at` DATETIME NOT NULL,
+    PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `logs` (
+    `id` BIGINT NOT NULL AUTO_INCREMENT,
+    `log_type` CHAR(1) NOT NULL,
+    `chat_id` VARCHAR(20) NOT NULL,
+    `created_at` DATETIME NOT NULL,
+    `is_sent` TINYINT(1) NOT NULL,
+    PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `trading` (
+    `id` BIGINT NOT NULL AUTO_INCREMENT,
+    `stock_code` VARCHAR(10) NOT NULL,
+    `buy_date` DATETIME NOT NULL,
+    `buy_price` DOUBLE NOT NULL,
+    `sell_price` DOUBLE NULL,
+    `sell_date` DATETIME NULL,
+    `last_price` DOUBLE NULL,
+    `profit_ratio` DOUBLE NULL,
+    `last_updated_at` DATETIME NOT NULL,
+    PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,24 @@
+-- 봇 명령어(/s, /d, /c, /e)와 DataFactory가 쓰는 조회용 복합 인덱스
+
+-- get_disclosure_data: disclosed_on 범위 + reason_code, stock_type 조건 후 corporate 조인
+CREATE INDEX `idx_executive_disclosed` ON `executive` (`disclosed_on`, `reason_code`, `stock_type`, `stock_code`);
+
+-- get_tg_company_data / get_tg_executive_data / get_tg_detail_data: 회사별 최신 rcept_no
+CREATE INDEX `idx_executive_stock_rcept` ON `executive` (`stock_code`, `rcept_no`);
+CREATE INDEX `idx_executive_stock_name` ON `executive` (`stock_code`, `executive_name`, `rcept_no`);
+CREATE INDEX `idx_executive_rcept` ON `executive` (`rcept_no`);
+
+-- get_corporate_info / get_tg_company_data / get_stock_code: corp_name 단건 조회
+CREATE INDEX `idx_corporate_name` ON `corporate` (`corp_name`);
+CREATE INDEX `idx_corporate_industry` ON `corporate` (`industry_code`);
+
+-- get_ticker_info: 종목별 날짜 조회 (business_date 기준 조회는 PK를 탄다)
+CREATE INDEX `idx_ticker_stock_date` ON `ticker` (`stock_code`, `business_date`);
+
+-- get_frequency_info
+CREATE INDEX `idx_frequency_period_date` ON `frequency` (`period`, `business_date`, `stock_code`);
+
+-- get_targets / get_holding_trades / get_trading_data
+CREATE INDEX `idx_user_nickname` ON `user` (`nickname`);
+CREATE INDEX `idx_trading_stock_buy` ON `trading` (`stock_code`, `buy_date`);
+CREATE INDEX `idx_trading_sell_date` ON `trading` (`sell_date`);
@@ -0,0 +1,8 @@
+-- DART 접수번호(rcept_no) -> 문서번호(dcm_no) 매핑. 한 번 찾은 dcm_no는 바뀌지 않는다.
+
+CREATE TABLE IF NOT EXISTS `dart_document` (
+    `rcept_no` VARCHAR(14) NOT NULL,
+    `dcm_no` VARCHAR(20) NOT NULL,
+    `created_at` DATETIME NOT NULL,
+    PRIMARY KEY (`rcept_no`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,21 @@
+-- 처리한 DART 공시(rcept_no)와 증분 수집 watermark. insert_executive는 dart_receipt에 있는 공시를 다시 받지 않는다.
+
+CREATE TABLE IF NOT EXISTS `dart_receipt` (
+    `rcept_no` VARCHAR(14) NOT NULL,
+    `rcept_dt` DATE NOT NULL,
+    `stock_code` VARCHAR(10) NOT NULL,
+    `row_count` INT NOT NULL,
+    `processed_at` DATETIME NOT NULL,
+    PRIMARY KEY (`rcept_no`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS `ingest_watermark` (
+    `name` VARCHAR(30) NOT NULL,
+    `rcept_no` VARCHAR(14) NOT NULL,
+    `updated_at` DATETIME NOT NULL,
+    PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 이미 적재된 executive를 처리 완료로 채워서 재실행 시 중복 insert를 막는다
+INSERT IGNORE INTO `dart_receipt` (rcept_no, rcept_dt, stock_code, row_count, processed_at)
+SELECT rcept_no, DATE(MIN(disclosed_on)), MIN(stock_code), COUNT(*), NOW() FROM `executive` GROUP BY rcept_no;
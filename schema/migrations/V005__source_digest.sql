@@ -0,0 +1,8 @@
+-- 외부 원본 파일의 digest. DART corpCode가 지난번과 같으면 corporate를 다시 파싱하지 않는다.
+
+CREATE TABLE IF NOT EXISTS `source_digest` (
+    `name` VARCHAR(30) NOT NULL,
+    `digest` VARCHAR(200) NOT NULL,
+    `updated_at` DATETIME NOT NULL,
+    PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -16,6 +16,7 @@ from utils.commons import convert_format
 from utils.config import BOT_TOKEN
 from utils.config import MODE
 from utils.config import TG_WORKERS
+from utils.config import SNAPSHOT_MODE
 
 from telegram.ext import Updater, CommandHandler, MessageHandler, Filters
 
@@ -25,6 +26,7 @@ class Snoopy:
         self.logger = LogManager().logger
         self.mode = MODE
         self.db_manager = DbManager()
+        self.db_manager.use_snapshot(SNAPSHOT_MODE)
         self.api_manager = ApiManager()
         self.tg_manager = TgManager()
         self.mail_manager = MailManager()
@@ -68,6 +70,7 @@ class Snoopy:
         buy_handler = CommandHandler('buy', self.commander.tg_buy, pass_args=True, run_async=False)
         sell_handler = CommandHandler('sell', self.commander.tg_sell, pass_args=True, run_async=False)
         notice_handler = CommandHandler('notice', self.commander.tg_notice, pass_args=True, run_async=False)
+        dbstats_handler = CommandHandler('dbstats', self.commander.tg_dbstats, pass_args=True, run_async=False)
         # TODO
         mail_handler = CommandHandler('mail', self.commander.tg_mail, pass_args=True, run_async=False)
 
@@ -85,6 +88,7 @@ class Snoopy:
         dispatcher.add_handler(buy_handler)
         dispatcher.add_handler(sell_handler)
         dispatcher.add_handler(notice_handler)
+        dispatcher.add_handler(dbstats_handler)
 
         dispatcher.add_handler(error_handler)
 
@@ -1,45 +1,145 @@
+import os
 import sys
-from datetime import datetime, timedelta
+import json
 import time
-from copy import deepcopy
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from data_factory import DataFactory
+from manager.log_manager import LogManager
 from manager.db_manager import DbManager
+from manager.business_calendar import BusinessCalendar
+from manager.krx import Krx, TICKER_COLUMNS
+from manager.price_store import PriceStore
+from utils.commons import get_current_time
+from utils.config import DATA_DIR, KRX_FINAL_TIME
+
+CHECKPOINT_FILE = DATA_DIR + 'ticker_checkpoint.json'
+MARKETS = ['KOSPI', 'KOSDAQ']
 
 
 class Ticker:
-    def __init__(self):
-        self.data_factory = DataFactory()
+    """
+    KRX 과거 시세를 날짜별로 동시에 받아 ticker에 넣는다. (start_date ~ end_date 양 끝 포함)
+    주말과 이미 ticker에 있는 영업일은 건너뛰고, (business_date, market) 단위로 지우고 다시 넣으므로 몇 번을 돌려도 같다.
+    끝난 날짜와 휴장일은 CHECKPOINT_FILE에 남아서 중간에 멈춰도 이어서 돌릴 수 있다. 요청 속도는 krx rate limit이 지킨다.
+    """
+    def __init__(self, checkpoint_file=CHECKPOINT_FILE):
+        self.logger = LogManager().logger
         self.db_manager = DbManager()
+        self.calendar = BusinessCalendar()
+        self.krx = Krx()
+        self.checkpoint_file = checkpoint_file
+        self.lock = threading.Lock()
+        self.done, self.closed = self.__load_checkpoint()
+
+    def __load_checkpoint(self):
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                checkpoint = json.load(f)
+            return set(checkpoint.get('done', [])), set(checkpoint.get('closed', []))
+        except (OSError, ValueError):
+            return set(), set()
+
+    def __save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_file), exist_ok=True)
+        tmp_file = f'{self.checkpoint_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'done': sorted(self.done), 'closed': sorted(self.closed)}, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def get_target_dates(self, start_date, end_date, reload):
+        day, end = datetime.strptime(start_date, '%Y%m%d'), datetime.strptime(end_date, '%Y%m%d')
+        dates = []
+        while day <= end:
+            target_date = day.strftime('%Y%m%d')
+            if day.weekday() < 5 and (reload or not (target_date in self.done or target_date in self.closed
+                                                     or self.calendar.is_business_date(target_date))):
+                dates.append(target_date)
+            day += timedelta(days=1)
+        return dates
+
+    def load(self, target_date):
+        """
+        'done' | 'closed' | 'failed'. 'closed'는 KRX가 row를 주고 그 값이 '-'일 때만이다.
+        """
+        if not self.krx.get_snapshot(target_date):
+            return 'failed'
+        if not self.krx.is_market_opened(target_date):
+            return 'closed'
+
+        for market in MARKETS:
+            tickers = self.krx.get_ticker_rows(target_date, market)
+            if not tickers or not self.db_manager.replace_ticker(target_date, market, tickers, TICKER_COLUMNS):
+                return 'failed'
+        return 'done'
+
+    def __report(self, target_date, status):
+        with self.lock:
+            if status == 'done':
+                self.done.add(target_date)
+                self.calendar.add(target_date)
+            elif status == 'closed':
+                self.closed.add(target_date)
+            if status != 'failed' and target_date < get_current_time('%Y%m%d'):  # 오늘 시세는 장 마감 후 다시 받는다
+                self.__save_checkpoint()
+
+    def get_last_final_date(self):
+        """
+        장 마감(KRX_FINAL_TIME) 전이면 오늘 시세는 아직 확정되지 않았으므로 어제까지만 넣는다.
+        """
+        return get_current_time('%Y%m%d', 0 if get_current_time('%H%M') >= KRX_FINAL_TIME else -1)
+
+    def run(self, start_date, end_date, workers=4, reload=False):
+        last_final_date = self.get_last_final_date()
+        if end_date > last_final_date:
+            self.logger.info(f"[ticker] end_date {end_date} -> {last_final_date} (not final yet)")
+            end_date = last_final_date
+        target_dates = self.get_target_dates(start_date, end_date, reload)
+        self.logger.info(f"[ticker] {start_date} ~ {end_date}: {len(target_dates)} days to load, {workers} workers")
+
+        started, failed = time.monotonic(), []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.load, d): d for d in target_dates}
+            for i, future in enumerate(as_completed(futures)):
+                target_date = futures[future]
+                try:
+                    status = future.result()
+                except Exception as e:
+                    self.logger.critical(f'[ERROR] ticker {target_date}\n{e}')
+                    status = 'failed'
+                self.__report(target_date, status)
+                if status == 'failed':
+                    failed.append(target_date)
+
+                minutes = (time.monotonic() - started) / 60
+                self.logger.info(f"[ticker] {target_date} {status} | {i + 1} / {len(target_dates)}, {(i + 1) / max(minutes, 1e-6):.1f} days/min")
 
-    def run(self, _start_date, _end_date):
-        markets = ["KOSPI", "KOSDAQ"]
-        _init_start_date = deepcopy(_start_date)
-        _start_date = datetime.strptime(_start_date, '%Y%m%d')
-        _end_date = datetime.strptime(_end_date, '%Y%m%d')
-        while True:
-            if _start_date == _end_date:
-                break
-            for market in markets:
-                print(f"[ticker] requesting for {_start_date} / {market}")
-                tickers = self.data_factory.get_ticker_info(market, _start_date.strftime('%Y%m%d'))
-                if not self.db_manager.insert_bulk_row('ticker', tickers):
-                    return
-                time.sleep(0.3)
-            _start_date = _start_date + timedelta(days=1)
-        print(f"[ticker] {_init_start_date} ~ {_end_date.strftime('%Y%m%d')} loaded")
+        self.db_manager.invalidate_cache(['ticker'])
+        if len(failed) < len(target_dates):
+            try:
+                PriceStore().rebuild(self.db_manager)  # 중간 날짜가 들어갔을 수 있으므로 새로 만든다
+            except Exception as e:
+                self.logger.critical(f'[ERROR] rebuild price store\n{e}')
+        if failed:
+            self.logger.info(f"[ticker] retry needed: {', '.join(sorted(failed))}")
+        self.logger.info(f"[ticker] {start_date} ~ {end_date} loaded")
 
 
 if __name__ == "__main__":
-    t = Ticker()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('start_date')
+    parser.add_argument('end_date')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--reload', action='store_true', help='checkpoint와 상관없이 범위 안의 평일을 모두 다시 넣는다')
+    args = parser.parse_args()
 
-    start_date = sys.argv[1] if len(sys.argv) >= 2 else None
-    end_date = sys.argv[2] if len(sys.argv) >= 3 else None
-    if (start_date and len(start_date) != 8) or (end_date and len(end_date) != 8):
+    if len(args.start_date) != 8 or len(args.end_date) != 8:
         print('[WARNING] date SHOULD BE LENGTH OF 8')
-        exit(0)
-    if end_date and int(start_date) >= int(end_date):
+        sys.exit(0)
+    if int(args.start_date) > int(args.end_date):
         print('[WARNING] end_date SHOULD BE LATER THAN start_date')
-        exit(0)
+        sys.exit(0)
 
-    t.run(start_date, end_date)
+    Ticker().run(args.start_date, args.end_date, args.workers, args.reload)
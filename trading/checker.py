@@ -44,11 +44,12 @@ class Checker:
             if not ticker:
                 self.logger.info(f"(checker)check expected ratio: no ticker")
                 return
+            ticker = {t.get('stock_code'): t for t in ticker}
 
             total_corporates = self.db_manager.get_total_corporates()
             for h in holding:
                 corp_name = [c.get('corp_name') for c in total_corporates if c.get('stock_code') == h.get('stock_code')][0]
-                current_price = [t.get('close') for t in ticker if t.get('stock_code') == h.get('stock_code')][0]
+                current_price = ticker[h.get('stock_code')].get('close')
                 last_price = h.get('buy_price') if not h.get('last_price') else h.get('last_price')  # 오늘 산 경우 고려
 
                 expected = get_profit_ratio(current_price, last_price, h.get('profit_ratio'))
@@ -33,12 +33,13 @@ class Closer:
             if not ticker:
                 self.logger.info(f"(checker)check expected ratio: no ticker")
                 return
+            ticker = {t.get('stock_code'): t for t in ticker}
 
             total_corporates = self.db_manager.get_total_corporates()
             tg_msg = f'[CLOSED]\n'
             for h in holding:
                 corp_name = [c.get('corp_name') for c in total_corporates if c.get('stock_code') == h.get('stock_code')][0]
-                sell_price = [t.get('close') for t in ticker if t.get('stock_code') == h.get('stock_code')][0]
+                sell_price = ticker[h.get('stock_code')].get('close')
                 last_price = h.get('buy_price') if not h.get('last_price') else h.get('last_price')
                 profit_ratio = h.get('profit_ratio')
                 params = {
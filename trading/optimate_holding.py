@@ -4,9 +4,12 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
 
 from collections import defaultdict
+from itertools import groupby
 import datetime
 
 from manager.db_manager import DbManager
+from manager.business_calendar import BusinessCalendar
+from manager.price_store import PriceStore
 from utils.commons import convert_to_str
 from utils.config import MINIMUM_TOTAL_AMOUNT, STRONG_TOTAL_AMOUNT, MAX_BUSINESS_DATE, MINIMUM_PROFIT
 
@@ -25,6 +28,8 @@ def calculate_accum(rate_before, rate_after):
 class A:
     def __init__(self):
         self.db_manager = DbManager()
+        self.calendar = BusinessCalendar()
+        self.price_store = PriceStore()
 
     def run(self):
         """
@@ -34,25 +39,31 @@ class A:
             }
         :return:
         """
+        if not self.price_store.exists():  # 빈 store로 아무것도 검증하지 않은 채 끝나지 않도록 ticker에서 먼저 만든다
+            self.price_store.rebuild(self.db_manager)
+
         final_list = []
-        total_company = self.db_manager.get_total_corporates()
+        total_company = {c.stock_code: c.corp_name for c in self.db_manager.stream_total_corporates(row_mode='namedtuple')}
 
         total_expected = defaultdict(list)
         result = defaultdict(int)
 
         start, end = datetime.datetime(2019, 1, 1, 0, 0), datetime.datetime(2020, 12, 31, 0, 0)
-        target_date_list = []
-
-        for d in range(MAX_BUSINESS_DATE):
-            business_date = self.db_manager.get_last_business_date(delta=d+1)
-            if business_date < start or business_date > end:
-                continue
-            target_date_list.append(business_date)
-        target_date_list = sorted(set(target_date_list))
+        oldest = self.calendar.get_last_business_date(delta=MAX_BUSINESS_DATE) or self.calendar.get_first_business_date()  # 최근 MAX_BUSINESS_DATE 영업일만, 모자라면 전부
+        target_date_list = self.calendar.get_business_dates(max(start, oldest), end)
+        if not target_date_list:  # 최근 MAX_BUSINESS_DATE 영업일이 검증 기간을 벗어나면 볼 날짜가 없다
+            print('================================')
+            print(final_list)
+            print(result)
+            print(0)
+            return
 
         stock_infos = []  # 해당 날짜에 불꽃 BUY라면 대상 회사 리스트에 넣고
-        for target_date in target_date_list:
-            disclosure_data = self.db_manager.get_disclosure_data(target_date, target_date)
+        target_dates = set(target_date_list)
+        disclosure_stream = self.db_manager.stream_disclosure_data(target_date_list[0], target_date_list[-1])
+        for target_date, disclosure_data in groupby(disclosure_stream, key=lambda d: d['disclosed_on']):  # 하루치만 메모리에 올린다
+            if target_date not in target_dates:
+                continue
 
             groupby_rcept = defaultdict(list)
             for d in disclosure_data:
@@ -87,13 +98,14 @@ class A:
             added_date = value.get('added_date')
             fire = f'{stock_code}_{convert_to_str(added_date, "%Y%md%d")}'
 
-            # 위에서 저장한 발생 시점으로부터 끝까지
-            for target in target_date_list:
+            # 위에서 저장한 발생 시점으로부터 끝까지 (price store의 memmap view라 복사 없이 읽는다)
+            dates, opens = self.price_store.get_window(stock_code, added_date, end, 'open')
+            _, closes = self.price_store.get_window(stock_code, added_date, end, 'close')
+            for d, o, c in zip(dates, opens, closes):
+                target = datetime.datetime.strptime(d, '%Y%m%d')
                 if target > added_date:
-                    company_name = [c.get('name') for c in total_company if c.get('stock_code') == stock_code][0]
+                    company_name = total_company.get(stock_code)
                     print(stock_code, company_name, target)
-                    ticker = self.db_manager.get_ticker_info(stock_code, target)
-                    o, c = ticker.get('open'), ticker.get('close')
                     if int(o) == 0 or int(c) == 0:
                         continue
 
@@ -10,6 +10,8 @@ if not config:
     print('NO config.json')
     sys.exit()
 
+DATA_DIR = os.path.dirname(os.path.realpath(__file__)) + '/../data/'
+
 MODE = config.get('mode')
 CRTFC_KEY = config.get('crtfc_key')
 WATCHDOG_BOT_TOKEN = config.get('watchdog_bot_token')
@@ -25,6 +27,12 @@ MAX_BUSINESS_DATE = 900
 MINIMUM_PROFIT = 10.0
 TG_WORKERS = 32
 TG_CONN_POOL = TG_WORKERS + 4
+BULK_CHUNK_SIZE = 1000
+STREAM_FETCH_SIZE = 1000
+CALENDAR_REFRESH_SECONDS = 600
+CACHE_TTL = 600
+CACHE_USER_TTL = 60
+CACHE_MAX_SIZE = 1024
 
 HOST = config.get('mysql').get('host')
 USER = config.get('mysql').get('user')
@@ -32,6 +40,45 @@ PASSWORD = config.get('mysql').get('password')
 DB = config.get('mysql').get('db')
 PORT = config.get('mysql').get('port')
 CHARSET = config.get('mysql').get('charset')
+DB_POOL_SIZE = config.get('mysql').get('pool_size', TG_WORKERS // 2)
+DB_POOL_TIMEOUT = config.get('mysql').get('pool_timeout', 10)
+DB_POOL_MAX_IDLE = config.get('mysql').get('pool_max_idle', 300)
+DB_POOL_PING_INTERVAL = config.get('mysql').get('pool_ping_interval', 30)
+LOCAL_INFILE = config.get('mysql').get('local_infile', False)
+SLOW_QUERY_MS = config.get('mysql').get('slow_query_ms', 500)
+SLOW_QUERY_EXPLAIN = config.get('mysql').get('slow_query_explain', False)
+QUERY_STATS_SAMPLES = 1000
+
+SNAPSHOT_MODE = config.get('snapshot', {}).get('mode', 'off')  # off | snapshot | local
+SNAPSHOT_PATH = config.get('snapshot', {}).get('path', DATA_DIR + 'snapshot.sqlite')
+SNAPSHOT_EXPORT = config.get('snapshot', {}).get('export', False)
+SNAPSHOT_TICKER_DAYS = 10
+
+RATE_LIMITS = {  # source별 초당 요청 수
+    'dart_api': 5,
+    'dart_viewer': 3,
+    'krx': 2,
+    'naver': 5,
+}
+RATE_LIMITS.update(config.get('rate_limits', {}))
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 1.0
+HTTP_TIMEOUT = 30
+DART_WORKERS = 8
+NAVER_WORKERS = 4
+HTTP_POOL_SIZE = DART_WORKERS * 2
+RESPONSE_CACHE_MODE = config.get('response_cache', {}).get('mode', 'on')  # off | on | replay
+RESPONSE_CACHE_TTL = {  # source별 응답 보관 시간(초). None은 만료 없음, 0은 저장 안 함
+    'dart_api': 60,
+    'dart_viewer': None,
+    'krx': 300,
+    'naver': 3600,
+}
+RESPONSE_CACHE_TTL.update(config.get('response_cache', {}).get('ttl', {}))
+RESPONSE_CACHE_MAX_MB = config.get('response_cache', {}).get('max_mb', 1024)  # 넘으면 오래된 응답부터 지운다
+KRX_SNAPSHOT_TTL = 300  # 장중 KRX 시세 snapshot 재사용 시간(초)
+KRX_FINAL_TIME = '1600'  # 이 시각 이후 받은 당일 snapshot은 확정본으로 보고 다시 받지 않는다
+PRICE_BAND_RATIO = config.get('price_band_ratio', 0.5)  # 공시 단가 허용 상한: 직전 영업일 고가 대비 비율
 
 REASON_CODE = {
     '장내매수': '01',
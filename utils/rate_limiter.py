@@ -0,0 +1,27 @@
+import time
+import threading
+
+
+class RateLimiter:
+    """
+    token bucket. 초당 rate개씩 토큰이 차고 최대 burst개까지 쌓인다.
+    acquire()는 토큰이 생길 때까지 기다리므로 여러 스레드가 같이 써도 전체 요청 속도가 rate를 넘지 않는다.
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)  # 토큰을 미리 빼두었으므로 lock 밖에서 기다려도 순서가 보장된다
+        return wait